@@ -0,0 +1,11 @@
+# python -m scripts [stage...]
+# Runs the generators as a dependency graph, see gen_pipeline.py.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gen_pipeline import main
+
+main()
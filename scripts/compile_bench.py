@@ -0,0 +1,204 @@
+# python ./compile_bench.py --options="" --options="--shared-signatures" --options="--raw-cfunctions"
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import generate_natives
+import natives_gen
+
+stubs_folder = os.path.join(generate_natives.scripts_folder, "compile_bench_stubs")
+results_file_name = os.path.join(generate_natives.scripts_folder, "compile_bench.json")
+
+
+def make_option_parser():
+    # The generator options a benchmark run can be made with, same flags as natives_gen.py and python -m scripts.
+    parser = argparse.ArgumentParser(prog="generator options", add_help=False)
+    natives_gen.add_binding_arguments(parser)
+    generate_natives.add_call_profile_argument(parser)
+    generate_natives.add_crossmap_argument(parser)
+    generate_natives.add_compact_natives_argument(parser)
+    return parser
+
+
+def generate_tree(options, src_folder):
+    """Runs both generators with `options` into `src_folder` instead of src/."""
+    args = make_option_parser().parse_args(shlex.split(options))
+
+    natives_gen.apply_binding_arguments(args)
+    generate_natives.apply_arguments(args)
+
+    generate_natives.natives_header_file_name = os.path.join(src_folder, "natives.hpp")
+    generate_natives.natives_table_file_name = os.path.join(src_folder, "natives_table.hpp")
+    generate_natives.crossmap_header_file_name = os.path.join(src_folder, "invoker", "crossmap.hpp")
+    natives_gen.natives_hpp_file_name = generate_natives.natives_header_file_name
+    natives_gen.lua_natives_folder = os.path.join(src_folder, "lua", "natives")
+    os.makedirs(os.path.join(src_folder, "invoker"), exist_ok=True)
+    os.makedirs(natives_gen.lua_natives_folder, exist_ok=True)
+
+    generate_natives.load_crossmap_data()
+    generate_natives.load_natives_data()
+    generate_natives.load_call_profile()
+    generate_natives.allocate_indices()
+    generate_natives.write_crossmap_header(generate_natives.render_crossmap_header())
+    generate_natives.write_natives_header(generate_natives.render_natives_header())
+    generate_natives.write_natives_table(generate_natives.render_natives_table())
+
+    with open(natives_gen.natives_hpp_file_name, "r") as natives_hpp:
+        functions_per_namespaces = natives_gen.get_natives_func_from_natives_hpp_file(natives_hpp)
+    natives_gen.write_generated_files(natives_gen.generate_native_binding_cpp_and_hpp_files(functions_per_namespaces))
+
+
+def get_measured_files():
+    files = [generate_natives.natives_header_file_name, generate_natives.crossmap_header_file_name]
+    files += sorted(os.path.join(natives_gen.lua_natives_folder, f) for f in os.listdir(natives_gen.lua_natives_folder) if f.endswith(".cpp"))
+    return files
+
+
+def read_time_trace(trace_file_name):
+    """Front-end time and template instantiation counts of a clang -ftime-trace file."""
+    with open(trace_file_name, "r") as f:
+        events = json.load(f)["traceEvents"]
+
+    frontend_us = 0
+    instantiations = {"InstantiateFunction": 0, "InstantiateClass": 0}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        if event["name"] == "Total Frontend":
+            frontend_us = event["dur"]
+        elif event["name"] in instantiations:
+            instantiations[event["name"]] += 1
+
+    return frontend_us / 1000, instantiations
+
+
+def compile_file(compiler, src_folder, file_name, trace_file_name):
+    command = [
+        compiler,
+        "-std=c++2b",
+        "-fsyntax-only",
+        "-w",
+        "-x",
+        "c++",
+        f"-ftime-trace={trace_file_name}",
+        # Every instantiation ends up in the trace instead of the ones above the default 500 us.
+        "-ftime-trace-granularity=0",
+        "-include",
+        os.path.join(stubs_folder, "common.hpp"),
+        "-I",
+        stubs_folder,
+        "-I",
+        src_folder,
+        file_name,
+    ]
+
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 instead of Popen.wait for the rusage of this compiler process alone.
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"{shlex.join(command)} failed:\n{stderr.read().decode(errors='replace')}")
+
+    frontend_ms, instantiations = read_time_trace(trace_file_name)
+    return {
+        "frontend_ms": round(frontend_ms, 1),
+        "wall_ms": round(wall_ms, 1),
+        "function_instantiations": instantiations["InstantiateFunction"],
+        "class_instantiations": instantiations["InstantiateClass"],
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(rusage.ru_maxrss / 1024, 1),
+    }
+
+
+def get_compiler_version(compiler):
+    return subprocess.run([compiler, "--version"], capture_output=True, text=True, check=True).stdout.splitlines()[0]
+
+
+def benchmark(compiler, options, jobs):
+    with tempfile.TemporaryDirectory() as folder:
+        src_folder = os.path.join(folder, "src")
+        generate_tree(options, src_folder)
+        files = get_measured_files()
+
+        def run(i):
+            return compile_file(compiler, src_folder, files[i], os.path.join(folder, f"trace_{i}.json"))
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            measures = list(executor.map(run, range(len(files))))
+
+        files = [os.path.relpath(f, src_folder).replace(os.sep, "/") for f in files]
+
+    total = {
+        "frontend_ms": round(sum(m["frontend_ms"] for m in measures), 1),
+        "function_instantiations": sum(m["function_instantiations"] for m in measures),
+        "class_instantiations": sum(m["class_instantiations"] for m in measures),
+        "peak_rss_mb": max(m["peak_rss_mb"] for m in measures),
+    }
+    return {"compiler": get_compiler_version(compiler), "files": dict(zip(files, measures)), "total": total}
+
+
+def print_result(label, result):
+    print(f"\n{label} ({result['compiler']})")
+    print(f"{'file':<48} {'front-end ms':>12} {'fn inst':>8} {'class inst':>10} {'peak MB':>8}")
+    for file_name, m in sorted(result["files"].items(), key=lambda item: -item[1]["frontend_ms"]):
+        print(f"{file_name:<48} {m['frontend_ms']:>12.1f} {m['function_instantiations']:>8} {m['class_instantiations']:>10} {m['peak_rss_mb']:>8.1f}")
+
+
+def print_summary(results, labels):
+    baseline = results[labels[0]]["total"]
+    print(f"\n{'options':<48} {'front-end ms':>12} {'fn inst':>8} {'class inst':>10} {'peak MB':>8}")
+    for label in labels:
+        total = results[label]["total"]
+        ratio = total["frontend_ms"] / baseline["frontend_ms"] if baseline["frontend_ms"] > 0 else 0
+        print(
+            f"{label:<48} {total['frontend_ms']:>12.1f} {total['function_instantiations']:>8} {total['class_instantiations']:>10} {total['peak_rss_mb']:>8.1f}"
+            f"  ({ratio:.2f}x)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures what the generated natives.hpp, crossmap.hpp and Lua bindings cost clang, against the stub headers of compile_bench_stubs/."
+    )
+    parser.add_argument(
+        "--options",
+        action="append",
+        metavar="OPTIONS",
+        help='generator options of a run, repeat it to compare runs, e.g. --options="" --options="--shared-signatures --raw-cfunctions" (default: one run with the default options)',
+    )
+    parser.add_argument("--compiler", default="clang++", help="clang driver to use, needs -ftime-trace=FILE support (clang 16+) (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="maximum number of files compiled concurrently, lower it for steadier timings")
+    parser.add_argument("--results", metavar="FILE", default=results_file_name, help="JSON file the results are merged into, keyed by options (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = {}
+    if os.path.exists(args.results):
+        with open(args.results, "r") as f:
+            results = json.load(f)
+
+    labels = []
+    for options in args.options or [""]:
+        label = " ".join(shlex.split(options)) or "(default)"
+        results[label] = benchmark(args.compiler, options, args.jobs)
+        labels.append(label)
+        print_result(label, results[label])
+
+    with open(args.results, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+
+    print_summary(results, labels)
+
+
+if __name__ == "__main__":
+    main()
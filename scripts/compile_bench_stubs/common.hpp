@@ -0,0 +1,27 @@
+#pragma once
+// Stand-in for src/common.hpp, force included by compile_bench.py like the precompiled header is by the real build.
+// Only what the generated files need, so the measured cost is the one of the generated code.
+#include <array>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <tuple>
+#include <type_traits>
+#include <utility>
+#include <vector>
+
+#if __has_include(<format>)
+#include <format>
+#else
+namespace std
+{
+	template<typename... Args>
+	std::string format(const char* fmt, Args&&... args);
+}
+#endif
+
+#define __declspec(x) __attribute__((x))
+#define FORCEINLINE inline __attribute__((always_inline))
+
+#include "lua/sol_include.hpp"
+#include <script/types.hpp>
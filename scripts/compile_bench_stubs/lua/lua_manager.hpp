@@ -0,0 +1,13 @@
+#pragma once
+#include <cstdint>
+
+namespace big
+{
+	class lua_manager
+	{
+	public:
+		std::uint64_t get_frame_count() const;
+	};
+
+	inline lua_manager* g_lua_manager;
+}
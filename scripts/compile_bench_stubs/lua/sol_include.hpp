@@ -0,0 +1,70 @@
+#pragma once
+// Declarations of the few Lua and sol entry points the generated bindings use, none of sol itself gets instantiated.
+struct lua_State;
+using lua_CFunction = int (*)(lua_State* L);
+using lua_Integer   = long long;
+using lua_Number    = double;
+
+extern "C"
+{
+	int lua_isinteger(lua_State* L, int index);
+	lua_Integer lua_tointeger(lua_State* L, int index);
+	lua_Number lua_tonumber(lua_State* L, int index);
+	int lua_toboolean(lua_State* L, int index);
+	void lua_pushinteger(lua_State* L, lua_Integer n);
+	void lua_pushnumber(lua_State* L, lua_Number n);
+	void lua_pushboolean(lua_State* L, int b);
+}
+
+#include <cmath>
+#include <cstddef>
+
+namespace sol
+{
+	struct stack_object
+	{
+		template<typename T>
+		bool is() const;
+		template<typename T>
+		T as() const;
+	};
+
+	struct this_state
+	{
+		lua_State* L;
+
+		operator lua_State*() const
+		{
+			return L;
+		}
+	};
+
+	struct table
+	{
+		template<typename F>
+		table& set_function(const char* name, F&& f);
+		table& set(const char* name, lua_CFunction f);
+		std::size_t size() const;
+		template<typename T>
+		T raw_get(int key) const;
+		template<typename T>
+		table& raw_set(int key, T&& value);
+	};
+
+	struct state_view
+	{
+		state_view(lua_State* L);
+		table create_table(int narr = 0, int nrec = 0);
+	};
+
+	struct proxy
+	{
+		template<typename T>
+		T get_or_create();
+	};
+
+	struct state
+	{
+		proxy operator[](const char* name);
+	};
+}
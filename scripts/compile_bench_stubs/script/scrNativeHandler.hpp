@@ -0,0 +1,37 @@
+#pragma once
+// Minimal rage::scrNativeCallContext, the real one comes from GTAV-Classes.
+#include <array>
+#include <cstdint>
+
+namespace rage
+{
+	using scrNativeHash = std::uint64_t;
+
+	class scrNativeCallContext
+	{
+	public:
+		constexpr void reset()
+		{
+			m_arg_count = 0;
+		}
+
+		template<typename T>
+		constexpr void push_arg(T&& value)
+		{
+			*reinterpret_cast<std::remove_cv_t<std::remove_reference_t<T>>*>(reinterpret_cast<std::uint64_t*>(m_args) + (m_arg_count++)) = std::forward<T>(value);
+		}
+
+		template<typename T>
+		constexpr T* get_return_value()
+		{
+			return reinterpret_cast<T*>(m_return_value);
+		}
+
+	protected:
+		void* m_return_value;
+		std::uint32_t m_arg_count;
+		void* m_args;
+	};
+
+	using scrNativeHandler = void (*)(scrNativeCallContext*);
+}
@@ -0,0 +1,35 @@
+#pragma once
+// Script types of GTAV-Classes.
+#include <cstdint>
+#include <string>
+
+using BOOL      = int;
+using Void      = std::uint32_t;
+using Any       = std::uint32_t;
+using Hash      = std::uint32_t;
+using Entity    = std::int32_t;
+using Player    = std::int32_t;
+using FireId    = std::int32_t;
+using Interior  = std::int32_t;
+using Ped       = Entity;
+using Vehicle   = Entity;
+using Cam       = std::int32_t;
+using Object    = Entity;
+using Pickup    = Object;
+using Blip      = std::int32_t;
+using ScrHandle = Entity;
+
+struct Vector3
+{
+	alignas(8) float x{};
+	alignas(8) float y{};
+	alignas(8) float z{};
+
+	Vector3() = default;
+	Vector3(float x, float y, float z) :
+	    x(x),
+	    y(y),
+	    z(z)
+	{
+	}
+};
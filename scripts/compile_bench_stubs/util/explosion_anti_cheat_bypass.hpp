@@ -0,0 +1,10 @@
+#pragma once
+
+namespace big
+{
+	struct explosion_anti_cheat_bypass
+	{
+		static void apply();
+		static void restore();
+	};
+}
@@ -0,0 +1,150 @@
+# python ./crossmap_bin.py crossmap.txt crossmap.bin
+
+import argparse
+import mmap
+import struct
+import zlib
+
+# Header: magic, format version, entry count and crc32 of the entries, followed by the entries sorted by
+# their first hash, each one being two little endian uint64 (hash, translated hash).
+magic = b"YMCM"
+version = 1
+header_format = struct.Struct("<4sIII")
+entry_format = struct.Struct("<QQ")
+
+
+def is_crossmap_bin(file_name):
+    with open(file_name, "rb") as f:
+        return f.read(len(magic)) == magic
+
+
+def parse_crossmap_text(lines, file_name):
+    """Returns the (hash, translated hash) pairs of the `0x...,0x...` lines, sorted by hash.
+    Malformed lines and hashes mapped more than once are errors."""
+    entries = {}
+    errors = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if len(line) == 0:
+            continue
+
+        fields = line.split(",")
+        try:
+            if len(fields) != 2 or not all(field.strip().lower().startswith("0x") for field in fields):
+                raise ValueError
+            hash, translated_hash = (int(field, 16) for field in fields)
+            if hash >= 2**64 or translated_hash >= 2**64:
+                raise ValueError
+        except ValueError:
+            errors.append(f"{file_name}:{line_number}: malformed entry '{line}'")
+            continue
+
+        if hash in entries:
+            errors.append(f"{file_name}:{line_number}: duplicate entry for 0x{hash:X}, first seen on line {entries[hash][1]}")
+            continue
+        entries[hash] = (translated_hash, line_number)
+
+    if len(errors) > 0:
+        print("Error while converting crossmap:")
+        for error in errors:
+            print(error)
+        exit(1)
+
+    return [(hash, entries[hash][0]) for hash in sorted(entries)]
+
+
+def write_crossmap_bin(entries, file_name):
+    body = b"".join(entry_format.pack(hash, translated_hash) for hash, translated_hash in entries)
+    with open(file_name, "wb") as f:
+        f.write(header_format.pack(magic, version, len(entries), zlib.crc32(body)))
+        f.write(body)
+
+
+class CrossmapReader:
+    """Memory maps a binary crossmap. The entries are read in place, `lookup()` binary searches them
+    and iterating unpacks them one by one, without copying the mapping.
+
+    Use it as a context manager: no view of the mapping outlives a call, so closing it never fails with a BufferError,
+    but the entries can't be read once it's closed."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.file = open(file_name, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        file_magic, file_version, self.count, crc = header_format.unpack_from(self.data, 0)
+        if file_magic != magic or file_version != version:
+            self.close()
+            print(f"Error while loading crossmap: {file_name} is not a version {version} binary crossmap")
+            exit(1)
+        if len(self.data) != header_format.size + self.count * entry_format.size or self.get_entries_crc() != crc:
+            self.close()
+            print(f"Error while loading crossmap: {file_name} is truncated or corrupted")
+            exit(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if not self.data.closed:
+            self.data.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return entry_format.unpack_from(self.data, header_format.size + i * entry_format.size)
+
+    def get_entries_crc(self):
+        # A slice of the mmap would be a copy of the whole file, the views are released before the mmap can be closed.
+        with memoryview(self.data) as view, view[header_format.size :] as entries:
+            return zlib.crc32(entries)
+
+    def __iter__(self):
+        # By index rather than struct.iter_unpack, which would hold a view of the mapping as long as the iterator lives.
+        for i in range(self.count):
+            yield self[i]
+
+    def lookup(self, hash):
+        """Returns the translated hash of `hash`, None if it isn't in the crossmap."""
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_hash, translated_hash = self[middle]
+            if middle_hash == hash:
+                return translated_hash
+            if middle_hash < hash:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converts a crossmap.txt to the binary crossmap format and back, validating the entries.")
+    parser.add_argument("input", help="text or binary crossmap, the format is detected")
+    parser.add_argument("output", help="converted crossmap, in the other format")
+    args = parser.parse_args()
+
+    if is_crossmap_bin(args.input):
+        with CrossmapReader(args.input) as reader:
+            lines = [f"0x{hash:016X},0x{translated_hash:016X}" for hash, translated_hash in reader]
+        with open(args.output, "w") as f:
+            f.write("\n".join(lines))
+        print(f"Wrote {len(lines)} entries to {args.output}")
+    else:
+        with open(args.input, "r") as f:
+            entries = parse_crossmap_text(f.readlines(), args.input)
+        write_crossmap_bin(entries, args.output)
+        print(f"Wrote {len(entries)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+import argparse
 import os
 from enum import Enum
 
-src_folder = "../src/"
+from gen_profiler import Profiler, add_profile_arguments
+from gen_watch import add_watch_arguments, watch, write_changed_files
+
+scripts_folder = os.path.dirname(os.path.abspath(__file__))
+src_folder = os.path.normpath(os.path.join(scripts_folder, "..", "src"))
+lua_docs_folder = os.path.normpath(os.path.join(scripts_folder, "..", "docs", "lua"))
+commands_dump_file_name = os.path.join(lua_docs_folder, "commands_dump.txt")
 
 lua_api_comment_identifier = "lua api"
 lua_api_comment_separator = ":"
@@ -302,84 +309,94 @@ def is_comment_a_lua_api_doc_comment(text_lower):
     )
 
 
-def parse_lua_api_doc(folder_path):
+def get_lua_api_doc_source_files(folder_path):
+    source_files = []
     for root, dirs, files in os.walk(folder_path):
         for file_name in files:
             if os.path.splitext(file_name)[1].startswith((".c", ".h")):
-                file_path = os.path.join(root, file_name)
-                with open(file_path, "r") as file:
-                    doc_kind = None
-                    cur_table = None
-                    cur_class = None
-                    cur_function = None
-                    cur_field = None
-                    cur_constructor = None
-
-                    for line in file:
-                        line = line.strip()
-                        line_lower = line.lower()
-                        if is_comment_a_lua_api_doc_comment(line_lower):
-                            doc_kind = DocKind(
-                                line.split(lua_api_comment_separator, 1)[1]
-                                .strip()
-                                .lower()
-                            )
-
-                            if (
-                                doc_kind is not DocKind.Tabs
-                                and doc_kind is not DocKind.Infraction
-                            ):
-                                continue
-
-                        if doc_kind is not None and "//" in line:
-                            match doc_kind:
-                                case DocKind.Table:
-                                    cur_table = parse_table_doc(
-                                        cur_table, line, line_lower
-                                    )
-                                case DocKind.Class:
-                                    cur_class = parse_class_doc(
-                                        cur_class, line, line_lower
-                                    )
-                                case DocKind.Function:
-                                    (
-                                        cur_function,
-                                        cur_table,
-                                        cur_class,
-                                    ) = parse_function_doc(
-                                        cur_function,
-                                        cur_table,
-                                        cur_class,
-                                        line,
-                                        line_lower,
-                                    )
-                                case DocKind.Field:
-                                    (cur_field, cur_table, cur_class) = parse_field_doc(
-                                        cur_field,
-                                        cur_table,
-                                        cur_class,
-                                        line,
-                                        line_lower,
-                                    )
-                                case DocKind.Constructor:
-                                    (
-                                        cur_constructor,
-                                        cur_class,
-                                    ) = parse_constructor_doc(
-                                        cur_constructor,
-                                        cur_class,
-                                        line,
-                                        line_lower,
-                                    )
-                                case DocKind.Tabs:
-                                    parse_tabs_doc(file)
-                                case DocKind.Infraction:
-                                    parse_infraction_doc(file)
-                                case _:
-                                    # print("unsupported doc kind: " + str(doc_kind))
-                                    pass
-                        else:
-                            doc_kind = None
+                source_files.append(os.path.join(root, file_name))
+    return source_files
+
+
+def parse_lua_api_doc(folder_path):
+    for file_path in get_lua_api_doc_source_files(folder_path):
+        with open(file_path, "r") as file:
+            parse_lua_api_doc_file(file)
+
+
+def parse_lua_api_doc_file(file):
+    doc_kind = None
+    cur_table = None
+    cur_class = None
+    cur_function = None
+    cur_field = None
+    cur_constructor = None
+
+    for line in file:
+        line = line.strip()
+        line_lower = line.lower()
+        if is_comment_a_lua_api_doc_comment(line_lower):
+            doc_kind = DocKind(
+                line.split(lua_api_comment_separator, 1)[1]
+                .strip()
+                .lower()
+            )
+
+            if (
+                doc_kind is not DocKind.Tabs
+                and doc_kind is not DocKind.Infraction
+            ):
+                continue
+
+        if doc_kind is not None and "//" in line:
+            match doc_kind:
+                case DocKind.Table:
+                    cur_table = parse_table_doc(
+                        cur_table, line, line_lower
+                    )
+                case DocKind.Class:
+                    cur_class = parse_class_doc(
+                        cur_class, line, line_lower
+                    )
+                case DocKind.Function:
+                    (
+                        cur_function,
+                        cur_table,
+                        cur_class,
+                    ) = parse_function_doc(
+                        cur_function,
+                        cur_table,
+                        cur_class,
+                        line,
+                        line_lower,
+                    )
+                case DocKind.Field:
+                    (cur_field, cur_table, cur_class) = parse_field_doc(
+                        cur_field,
+                        cur_table,
+                        cur_class,
+                        line,
+                        line_lower,
+                    )
+                case DocKind.Constructor:
+                    (
+                        cur_constructor,
+                        cur_class,
+                    ) = parse_constructor_doc(
+                        cur_constructor,
+                        cur_class,
+                        line,
+                        line_lower,
+                    )
+                case DocKind.Tabs:
+                    parse_tabs_doc(file)
+                case DocKind.Infraction:
+                    parse_infraction_doc(file)
+                case _:
+                    # print("unsupported doc kind: " + str(doc_kind))
+                    pass
+        else:
+            doc_kind = None
 
 
 def parse_table_doc(cur_table, line, line_lower):
@@ -594,28 +611,17 @@ def is_lua_doc_comment_startswith(line_lower, starts_with_text):
     return line_lower.replace("//", "").strip().startswith(starts_with_text)
 
 
-parse_lua_api_doc(src_folder)
+def load_commands_dump():
+    commands = []
+    with open(commands_dump_file_name, "r") as file:
+        for line in file:
+            cmd = line.split("|", 1)[1].strip().split("|")
+            commands.append(cmd)
+    return commands
 
-try:
-    os.makedirs("../docs/lua/tables/")
-except:
-    pass
 
-for table_name, table in tables.items():
-    file_name = f"../docs/lua/tables/{table_name}.md"
-    if os.path.exists(file_name):
-        os.remove(file_name)
-    f = open(file_name, "ba")
-    f.write(bytes(str(table), "UTF8"))
-    f.close()
-
-tabs_file_name = f"../docs/lua/tabs.md"
-if os.path.exists(tabs_file_name):
-    os.remove(tabs_file_name)
-f = open(tabs_file_name, "a")
-
-f.write(
-    """# Tabs
+def render_tabs_doc():
+    s = """# Tabs
 
 All the tabs from the menu are listed below, used as parameter for adding gui elements to them.
 
@@ -631,23 +637,18 @@ end)
 For a complete list of available gui functions, please refer to the tab class documentation and the gui table documentation.
 
 """
-)
 
-f.write(f"## Tab Count: {len(tabs_enum)}\n\n")
+    s += f"## Tab Count: {len(tabs_enum)}\n\n"
 
-# Minus the first, because it's the `NONE` tab, minus the last one because it's for runtime defined tabs.
-for i in range(1, len(tabs_enum) - 1):
-    f.write("### `GUI_TAB_" + tabs_enum[i] + "`\n")
+    # Minus the first, because it's the `NONE` tab, minus the last one because it's for runtime defined tabs.
+    for i in range(1, len(tabs_enum) - 1):
+        s += "### `GUI_TAB_" + tabs_enum[i] + "`\n"
 
-f.close()
+    return s
 
-infraction_file_name = f"../docs/lua/infraction.md"
-if os.path.exists(infraction_file_name):
-    os.remove(infraction_file_name)
-f = open(infraction_file_name, "a")
 
-f.write(
-    """# Infraction
+def render_infraction_doc():
+    s = """# Infraction
 
 All the infraction from the menu are listed below, used as parameter for adding an infraction to a given player, for flagging them as modder.
 
@@ -657,36 +658,17 @@ network.flag_player_as_modder(player_index, infraction.CUSTOM_REASON, "My custom
 ```
 
 """
-)
-
-f.write(f"## Infraction Count: {len(infraction_enum)}\n\n")
 
-for i in range(0, len(infraction_enum)):
-    f.write("### `" + infraction_enum[i] + "`\n")
+    s += f"## Infraction Count: {len(infraction_enum)}\n\n"
 
-f.close()
+    for i in range(0, len(infraction_enum)):
+        s += "### `" + infraction_enum[i] + "`\n"
 
-try:
-    os.makedirs("../docs/lua/classes/")
-except:
-    pass
+    return s
 
-for class_name, class_ in classes.items():
-    file_name = f"../docs/lua/classes/{class_name}.md"
-    if os.path.exists(file_name):
-        os.remove(file_name)
-    f = open(file_name, "ba")
-    f.write(bytes(str(class_), "UTF8"))
-    f.close()
 
-
-commands_file_name = f"../docs/lua/commands.md"
-if os.path.exists(commands_file_name):
-    os.remove(commands_file_name)
-f = open(commands_file_name, "a")
-
-f.write(
-    """# Commands
+def render_commands_doc(commands):
+    s = """# Commands
 
 All the current commands from the menu are listed below.
 
@@ -700,25 +682,140 @@ command.call_player(somePlayerIndex, "spawn", {joaat("adder")})
 For a complete list of available command functions, please refer to the command table documentation.
 
 """
-)
 
+    s += f"## Command Count: {len(commands)}\n\n"
 
-commands = []
-with open("../docs/lua/commands_dump.txt", "r") as file:
-    for line in file:
-        cmd = line.split("|", 1)[1].strip().split("|")
-        commands.append(cmd)
-
-f.write(f"## Command Count: {len(commands)}\n\n")
-
-for cmd in commands:
-    name = cmd[0]
-    label = cmd[1]
-    desc = cmd[2]
-    arg_count = cmd[3]
-    f.write(f"### {name}\n")
-    f.write(f"{desc}\n")
-    f.write(f"Arg Count: {arg_count}\n")
-    f.write("\n")
-
-f.close()
+    for cmd in commands:
+        name = cmd[0]
+        label = cmd[1]
+        desc = cmd[2]
+        arg_count = cmd[3]
+        s += f"### {name}\n"
+        s += f"{desc}\n"
+        s += f"Arg Count: {arg_count}\n"
+        s += "\n"
+
+    return s
+
+
+def render_docs(commands):
+    # Tables and classes are written as UTF8 bytes, the rest as text.
+    docs = {}
+
+    for table_name, table in tables.items():
+        docs[os.path.join(lua_docs_folder, "tables", f"{table_name}.md")] = bytes(str(table), "UTF8")
+
+    docs[os.path.join(lua_docs_folder, "tabs.md")] = render_tabs_doc()
+    docs[os.path.join(lua_docs_folder, "infraction.md")] = render_infraction_doc()
+
+    for class_name, class_ in classes.items():
+        docs[os.path.join(lua_docs_folder, "classes", f"{class_name}.md")] = bytes(str(class_), "UTF8")
+
+    docs[os.path.join(lua_docs_folder, "commands.md")] = render_commands_doc(commands)
+
+    return docs
+
+
+def write_docs(docs):
+    try:
+        os.makedirs(os.path.join(lua_docs_folder, "tables"))
+    except:
+        pass
+
+    try:
+        os.makedirs(os.path.join(lua_docs_folder, "classes"))
+    except:
+        pass
+
+    for file_name, content in docs.items():
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        f = open(file_name, "ba" if isinstance(content, bytes) else "a")
+        f.write(content)
+        f.close()
+
+
+def reset_lua_api_doc():
+    tables.clear()
+    classes.clear()
+    functions.clear()
+    tabs_enum.clear()
+    infraction_enum.clear()
+
+
+def watch_docs(interval):
+    # Keep the content of every source file resident and only re-read the ones that changed,
+    # rebuilding the doc model from memory is much cheaper than walking and reading src/ again.
+    source_files = {}
+    for file_path in get_lua_api_doc_source_files(src_folder):
+        with open(file_path, "r") as file:
+            source_files[file_path] = file.readlines()
+
+    def build_docs():
+        reset_lua_api_doc()
+        for lines in source_files.values():
+            parse_lua_api_doc_file(iter(lines))
+        return render_docs(load_commands_dump())
+
+    docs = build_docs()
+    write_docs(docs)
+
+    def on_change(changed):
+        nonlocal docs
+
+        for file_path in changed:
+            if file_path == commands_dump_file_name:
+                continue
+
+            if os.path.exists(file_path):
+                with open(file_path, "r") as file:
+                    source_files[file_path] = file.readlines()
+            else:
+                source_files.pop(file_path, None)
+
+        try:
+            new_docs = build_docs()
+        except SystemExit:
+            # Duplicate fields exit the regular run, keep watching so the mistake can be fixed.
+            print("Keeping the previous docs")
+            return []
+
+        written = write_changed_files(docs, new_docs)
+        docs = new_docs
+        print(f"Rewrote {len(written)} doc files")
+
+        return written
+
+    watch(
+        lambda: get_lua_api_doc_source_files(src_folder) + [commands_dump_file_name],
+        on_change,
+        interval,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates the Lua documentation under docs/lua/ from the lua api comments in src/.")
+    add_profile_arguments(parser)
+    add_watch_arguments(parser)
+    args = parser.parse_args()
+
+    if args.watch:
+        watch_docs(args.watch_interval)
+        return
+
+    profiler = Profiler.from_args(args)
+    profiler.start()
+
+    with profiler.stage("load"):
+        parse_lua_api_doc(src_folder)
+        commands = load_commands_dump()
+    with profiler.stage("render"):
+        docs = render_docs(commands)
+    with profiler.stage("write"):
+        write_docs(docs)
+
+    profiler.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import doc_gen
+import generate_natives
+import lua_mock_gen
+import natives_doc_gen
+import natives_gen
+from gen_profiler import Profiler, add_profile_arguments
+
+state_file_name = os.path.join(generate_natives.scripts_folder, ".gen_state.json")
+
+# --force, the stages keeping their own cache bypass it too.
+force = False
+
+
+class Stage:
+    """A node of the generator dependency graph.
+
+    `inputs` returns the files the stage reads, `outputs` describes the files it writes and `run` returns
+    the files it actually wrote. `options` returns the generator options affecting the outputs, they're part of the
+    up to date check like the inputs. Stages without outputs only build in memory data for the stages depending on them,
+    they run whenever one of those has to."""
+
+    def __init__(self, name, deps, inputs, outputs, run, options=lambda: {}):
+        self.name = name
+        self.deps = deps
+        self.inputs = inputs
+        self.outputs = outputs
+        self.run = run
+        self.options = options
+
+    def is_in_memory(self):
+        return len(self.outputs) == 0
+
+
+def generator_script(module):
+    return os.path.abspath(module.__file__)
+
+
+def run_bindings_stage():
+    with open(natives_gen.natives_hpp_file_name, "r") as natives_hpp:
+        functions_per_namespaces = natives_gen.get_natives_func_from_natives_hpp_file(natives_hpp)
+    files = natives_gen.generate_native_binding_cpp_and_hpp_files(functions_per_namespaces)
+    natives_gen.write_generated_files(files)
+    return list(files.keys())
+
+
+def run_docs_stage():
+    doc_gen.parse_lua_api_doc(doc_gen.src_folder)
+    docs = doc_gen.render_docs(doc_gen.load_commands_dump())
+    doc_gen.write_docs(docs)
+    return list(docs.keys())
+
+
+def run_native_docs_stage():
+    # In process, a process pool started from a pipeline worker thread would fork a multithreaded process.
+    natives_doc_gen.generate_natives_docs(jobs=1, force=force)
+    return [os.path.join(natives_doc_gen.natives_docs_folder, f) for f in sorted(os.listdir(natives_doc_gen.natives_docs_folder))]
+
+
+def run_lua_mock_stage():
+    lua_mock_gen.generate_mock_natives()
+    return [lua_mock_gen.mock_natives_file_name]
+
+
+def run_index_stage():
+    generate_natives.load_call_profile()
+    generate_natives.allocate_indices()
+
+
+def run_headers_stage():
+    crossmap_header = generate_natives.render_crossmap_header()
+    natives_header = generate_natives.render_natives_header()
+    natives_table = generate_natives.render_natives_table()
+    generate_natives.write_crossmap_header(crossmap_header)
+    generate_natives.write_natives_header(natives_header)
+    generate_natives.write_natives_table(natives_table)
+    return get_natives_header_files() + [generate_natives.crossmap_header_file_name]
+
+
+def get_natives_header_files():
+    # With --compact-natives the natives themselves are in the table natives.hpp includes.
+    if generate_natives.compact_natives:
+        return [generate_natives.natives_header_file_name, generate_natives.natives_table_file_name]
+    return [generate_natives.natives_header_file_name]
+
+
+def get_headers_options():
+    return {"compact_natives": generate_natives.compact_natives}
+
+
+def get_binding_config_files():
+    # The optional --memo and --arrays files select natives, they are inputs like natives.hpp.
+    return [f for f in (natives_gen.memo_file_name, natives_gen.arrays_file_name) if f is not None]
+
+
+def get_doc_source_files():
+    # The generated sources never carry lua api comments, leaving them out lets the docs run concurrently with the stages writing them.
+    generated = (
+        generate_natives.natives_header_file_name,
+        generate_natives.natives_table_file_name,
+        generate_natives.crossmap_header_file_name,
+        natives_gen.lua_natives_folder + os.sep,
+    )
+    return [f for f in doc_gen.get_lua_api_doc_source_files(doc_gen.src_folder) if not f.startswith(generated)]
+
+
+def make_stages():
+    stages = [
+        Stage(
+            "crossmap",
+            [],
+            lambda: [generate_natives.crossmap_file_name],
+            [],
+            generate_natives.load_crossmap_data,
+        ),
+        Stage(
+            "natives",
+            [],
+            lambda: [generate_natives.natives_json_file_name],
+            [],
+            generate_natives.load_natives_data,
+        ),
+        Stage(
+            "index",
+            ["crossmap", "natives"],
+            lambda: [generate_natives.call_profile_file_name] if generate_natives.call_profile_file_name is not None else [],
+            [],
+            run_index_stage,
+        ),
+        Stage(
+            "headers",
+            ["index"],
+            lambda: [generator_script(generate_natives)],
+            [generate_natives.natives_header_file_name, generate_natives.natives_table_file_name, generate_natives.crossmap_header_file_name],
+            run_headers_stage,
+            get_headers_options,
+        ),
+        Stage(
+            "bindings",
+            ["headers"],
+            lambda: get_natives_header_files() + [generator_script(natives_gen)] + get_binding_config_files(),
+            [os.path.join(natives_gen.lua_natives_folder, "lua_native_*.[ch]pp"), os.path.join(natives_gen.lua_natives_folder, "lua_native_sources.cmake")],
+            run_bindings_stage,
+            natives_gen.get_binding_options,
+        ),
+        Stage(
+            "docs",
+            [],
+            lambda: get_doc_source_files() + [doc_gen.commands_dump_file_name, generator_script(doc_gen)],
+            [os.path.join(doc_gen.lua_docs_folder, "*.md"), os.path.join(doc_gen.lua_docs_folder, "tables", "*.md"), os.path.join(doc_gen.lua_docs_folder, "classes", "*.md")],
+            run_docs_stage,
+        ),
+        Stage(
+            "native_docs",
+            ["crossmap"],
+            lambda: [generate_natives.natives_json_file_name, generator_script(natives_doc_gen), generator_script(natives_gen)],
+            [os.path.join(natives_doc_gen.natives_docs_folder, "*.md")],
+            run_native_docs_stage,
+        ),
+        Stage(
+            "lua_mock",
+            ["headers"],
+            lambda: get_natives_header_files()
+            + [generator_script(lua_mock_gen), generator_script(natives_gen), generator_script(natives_doc_gen)]
+            + ([natives_gen.arrays_file_name] if natives_gen.arrays_file_name is not None else []),
+            [lua_mock_gen.mock_natives_file_name],
+            run_lua_mock_stage,
+            lambda: {"vector3_returns": natives_gen.vector3_returns, "arrays": natives_gen.arrays_file_name is not None},
+        ),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+def hash_file(file_name):
+    try:
+        with open(file_name, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def hash_files(file_names):
+    return {os.path.relpath(file_name, generate_natives.scripts_folder): hash_file(file_name) for file_name in file_names}
+
+
+class Pipeline:
+    def __init__(self, stages, state, force, profiler):
+        self.stages = stages
+        self.state = state
+        self.force = force
+        self.profiler = profiler
+        self.lock = threading.Lock()
+        self.ran = []
+        self.skipped = []
+
+    def get_all_inputs(self, stage):
+        # A stage also depends on the inputs of the in memory stages it gets its data from.
+        inputs = list(stage.inputs())
+        for dep in stage.deps:
+            if self.stages[dep].is_in_memory():
+                inputs += self.get_all_inputs(self.stages[dep])
+        return inputs
+
+    def is_up_to_date(self, stage):
+        recorded = self.state.get(stage.name)
+        if recorded is None:
+            return False
+
+        if hash_files(self.get_all_inputs(stage)) != recorded["inputs"] or stage.options() != recorded.get("options", {}):
+            return False
+
+        outputs = [os.path.join(generate_natives.scripts_folder, file_name) for file_name in recorded["outputs"]]
+        return hash_files(outputs) == recorded["outputs"]
+
+    def plan(self, targets):
+        """Returns the stages needed to build the targets, and the ones among them that may have to run."""
+        needed = []
+
+        def visit(name):
+            if name in needed:
+                return
+            for dep in self.stages[name].deps:
+                visit(dep)
+            needed.append(name)
+
+        for target in targets:
+            visit(target)
+
+        may_run = set()
+        for name in needed:
+            stage = self.stages[name]
+            if stage.is_in_memory():
+                continue
+            if self.force or not self.is_up_to_date(stage) or self.has_upstream(stage, may_run):
+                may_run.add(name)
+
+        # In memory stages only have to run for a consumer that may run.
+        for name in reversed(needed):
+            if self.stages[name].is_in_memory() and any(name in self.stages[n].deps for n in may_run):
+                may_run.add(name)
+
+        return needed, may_run
+
+    def has_upstream(self, stage, may_run):
+        for dep in stage.deps:
+            if dep in may_run or self.has_upstream(self.stages[dep], may_run):
+                return True
+        return False
+
+    def run_stage(self, stage, may_run):
+        if stage.name not in may_run:
+            self.skipped.append(stage.name)
+            return
+
+        # Upstream stages may have rewritten our inputs with identical content, check again now that they are done.
+        if not stage.is_in_memory() and not self.force and self.is_up_to_date(stage):
+            self.skipped.append(stage.name)
+            return
+
+        inputs = hash_files(self.get_all_inputs(stage))
+        with self.profiler.stage(stage.name):
+            written = stage.run()
+        self.ran.append(stage.name)
+
+        if not stage.is_in_memory():
+            with self.lock:
+                self.state[stage.name] = {"inputs": inputs, "options": stage.options(), "outputs": hash_files(written)}
+
+    def run(self, targets, jobs):
+        needed, may_run = self.plan(targets)
+        done = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while len(done) < len(needed):
+                for name in needed:
+                    if name in done or name in running.values():
+                        continue
+                    if all(dep in done for dep in self.stages[name].deps):
+                        running[executor.submit(self.run_stage, self.stages[name], may_run)] = name
+
+                finished, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    future.result()
+                    done.add(name)
+
+
+def load_state():
+    if not os.path.exists(state_file_name):
+        return {}
+    with open(state_file_name, "r") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    with open(state_file_name, "w") as f:
+        json.dump(state, f, indent=4, sort_keys=True)
+
+
+def main():
+    global force
+
+    stages = make_stages()
+
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts",
+        description="Runs the code and documentation generators, skipping the stages whose inputs didn't change.",
+    )
+    parser.add_argument("stages", nargs="*", metavar="stage", help=f"stages to build along with their dependencies (default: all), one of: {', '.join(stages)}")
+    parser.add_argument("--force", action="store_true", help="run the stages even if they are up to date")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="maximum number of stages to run concurrently")
+    parser.add_argument("--list", action="store_true", help="list the stages with their inputs and outputs and exit")
+    generate_natives.add_call_profile_argument(parser)
+    generate_natives.add_crossmap_argument(parser)
+    generate_natives.add_compact_natives_argument(parser)
+    natives_gen.add_binding_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    natives_gen.apply_binding_arguments(args)
+    generate_natives.apply_arguments(args)
+    force = args.force
+
+    for name in args.stages:
+        if name not in stages:
+            parser.error(f"unknown stage '{name}'")
+
+    if args.list:
+        for stage in stages.values():
+            print(f"{stage.name}")
+            print(f"\tdepends on: {', '.join(stage.deps) if len(stage.deps) > 0 else '-'}")
+            inputs = stage.inputs()
+            print(f"\tinputs: {', '.join(os.path.relpath(i) for i in inputs[:4])}{f' (+{len(inputs) - 4} more)' if len(inputs) > 4 else ''}")
+            print(f"\toutputs: {', '.join(os.path.relpath(o) for o in stage.outputs) if len(stage.outputs) > 0 else '(in memory)'}")
+        return
+
+    profiler = Profiler.from_args(args)
+    if profiler.enabled:
+        # The stage timings and memory peaks would overlap otherwise.
+        args.jobs = 1
+    profiler.start()
+
+    state = load_state()
+    pipeline = Pipeline(stages, state, args.force, profiler)
+    try:
+        pipeline.run(args.stages if len(args.stages) > 0 else list(stages), args.jobs)
+    finally:
+        save_state(state)
+
+    print(f"Ran: {', '.join(pipeline.ran) if len(pipeline.ran) > 0 else '-'}")
+    print(f"Up to date: {', '.join(pipeline.skipped) if len(pipeline.skipped) > 0 else '-'}")
+
+    profiler.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageTiming:
+    def __init__(self, name, wall_time, cpu_time, peak_memory):
+        self.name = name
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_memory = peak_memory
+
+    def __str__(self) -> str:
+        return f"{self.name:<12} {self.wall_time * 1000:>10.1f} {self.cpu_time * 1000:>10.1f} {self.peak_memory / 1024:>12.1f}"
+
+    def to_json(self):
+        return {
+            "name": self.name,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "peak_memory": self.peak_memory,
+        }
+
+
+class Profiler:
+    """Collects wall time, CPU time and peak traced memory for each named stage of a generator run.
+
+    Every method is a no-op when the profiler is disabled, so the generators can always
+    wrap their stages in `profiler.stage(...)` without paying for tracemalloc.
+    """
+
+    def __init__(self, enabled=False, cprofile_path=None, json_path=None):
+        self.enabled = enabled or cprofile_path is not None or json_path is not None
+        self.cprofile_path = cprofile_path
+        self.json_path = json_path
+        self.stages: list[StageTiming] = []
+        self.cprofile = None
+
+    @staticmethod
+    def from_args(args):
+        return Profiler(args.profile, args.profile_stats, args.profile_json)
+
+    def start(self):
+        if not self.enabled:
+            return
+
+        tracemalloc.start()
+        if self.cprofile_path is not None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            self.stages.append(StageTiming(name, wall_time, cpu_time, peak_memory))
+
+    def report(self):
+        if not self.enabled:
+            return
+
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            pstats.Stats(self.cprofile).dump_stats(self.cprofile_path)
+            print(f"Wrote cProfile stats to {self.cprofile_path}")
+        tracemalloc.stop()
+
+        print(f"{'stage':<12} {'wall (ms)':>10} {'cpu (ms)':>10} {'peak (KiB)':>12}")
+        for stage in self.stages:
+            print(stage)
+        print(f"{'total':<12} {sum(s.wall_time for s in self.stages) * 1000:>10.1f} {sum(s.cpu_time for s in self.stages) * 1000:>10.1f}")
+
+        if self.json_path is not None:
+            with open(self.json_path, "w") as f:
+                json.dump({"stages": [s.to_json() for s in self.stages]}, f, indent=4)
+            print(f"Wrote timing report to {self.json_path}")
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="report wall time, CPU time and peak memory per stage")
+    parser.add_argument("--profile-stats", metavar="FILE", help="dump cProfile stats of the whole run to FILE (implies --profile)")
+    parser.add_argument("--profile-json", metavar="FILE", help="write the per stage timing report to FILE as JSON (implies --profile)")
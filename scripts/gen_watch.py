@@ -0,0 +1,92 @@
+import os
+import time
+import traceback
+
+
+class FileWatcher:
+    """Polls the modification time and size of a set of files.
+
+    Polling keeps the watch mode dependency free and behaves the same on Windows and Linux,
+    stat'ing the few hundred inputs we care about is well under the poll interval.
+    """
+
+    def __init__(self, get_paths):
+        self.get_paths = get_paths
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for path in self.get_paths():
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                pass
+        return snapshot
+
+    def poll(self):
+        """Returns the paths that changed since the last snapshot and the new snapshot, which the caller
+        saves in `self.snapshot` once it handled the changes."""
+        snapshot = self.take_snapshot()
+        changed = {path for path, stat in snapshot.items() if self.snapshot.get(path) != stat}
+        changed |= self.snapshot.keys() - snapshot.keys()
+        return changed, snapshot
+
+
+def watch(get_paths, on_change, interval):
+    """Calls `on_change` with the set of changed paths until interrupted.
+
+    `on_change` returns the files it wrote, so they aren't reported as changes on the next poll."""
+    watcher = FileWatcher(get_paths)
+    print(f"Watching {len(watcher.snapshot)} files, press Ctrl+C to stop.")
+
+    try:
+        while True:
+            time.sleep(interval)
+            changed, snapshot = watcher.poll()
+            if len(changed) == 0:
+                continue
+
+            start = time.perf_counter()
+            try:
+                written = on_change(changed)
+            except Exception:
+                # Most likely an input that was still being written, the snapshot isn't saved so the next poll retries.
+                traceback.print_exc()
+                continue
+
+            watcher.snapshot = snapshot
+            for path in written:
+                if path in watcher.snapshot:
+                    stat = os.stat(path)
+                    watcher.snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            print(f"Regenerated in {(time.perf_counter() - start) * 1000:.0f} ms ({', '.join(sorted(os.path.basename(p) for p in changed))})")
+    except KeyboardInterrupt:
+        pass
+
+
+def write_changed_files(previous, current):
+    """Writes the files of `current` whose content differs from `previous` and removes the ones that are gone.
+
+    Both are dicts of file name to content, returns the names of the files written."""
+    written = []
+
+    for file_name, content in current.items():
+        if previous.get(file_name) == content:
+            continue
+
+        f = open(file_name, "wb" if isinstance(content, bytes) else "w")
+        f.write(content)
+        f.close()
+        written.append(file_name)
+
+    for file_name in previous.keys() - current.keys():
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+    return written
+
+
+def add_watch_arguments(parser):
+    parser.add_argument("--watch", action="store_true", help="keep running and regenerate the outputs affected by changed inputs")
+    parser.add_argument("--watch-interval", metavar="SECONDS", type=float, default=0.2, help="poll interval of --watch (default: %(default)s)")
@@ -1,7 +1,29 @@
+import argparse
 import json
+import os
+
+import crossmap_bin
+from gen_profiler import Profiler, add_profile_arguments
+
+scripts_folder = os.path.dirname(os.path.abspath(__file__))
+src_folder = os.path.normpath(os.path.join(scripts_folder, "..", "src"))
+
+default_crossmap_file_name = os.path.join(scripts_folder, "crossmap.txt")
+crossmap_file_name = default_crossmap_file_name
+natives_json_file_name = os.path.join(scripts_folder, "natives.json")
+crossmap_header_file_name = os.path.join(src_folder, "invoker", "crossmap.hpp")
+natives_header_file_name = os.path.join(src_folder, "natives.hpp")
+natives_table_file_name = os.path.join(src_folder, "natives_table.hpp")
+
+# Emit natives.hpp as an X-macro table of the natives instead of a function definition per native, see render_natives_table().
+compact_natives = False
+
+# Optional call frequency profile used to order the native indices, see load_call_profile().
+call_profile_file_name = None
 
 crossmap = {}
 natives = {}
+call_profile = {}
 current_idx = 0
 crossmap_hash_list = []
 
@@ -42,6 +64,14 @@ class NativeFunc:
         
         return f"FORCEINLINE constexpr {self.return_type} {self.name}({param_decl}) {{ return big::native_invoker::invoke<{self.native_index}, {self.fix_vectors}, {self.return_type}>({param_pass}); }}"
 
+    def get_native_row_str(self) -> str:
+        assert self.native_index != -1
+
+        row = f"NATIVE({self.name}, {self.native_index}, {self.fix_vectors}, {self.return_type}"
+        for arg in self.args:
+            row += ", " + str(arg)
+        return row + ")"
+
 class CrossmapEntry:
     def __init__(self, translated_hash: int):
         self.hash = translated_hash
@@ -50,7 +80,15 @@ class CrossmapEntry:
 def load_crossmap_data():
     global crossmap
 
-    data = open("crossmap.txt").readlines()
+    crossmap.clear()
+    # Either the text crossmap or one converted by crossmap_bin.py, which is already validated.
+    if crossmap_bin.is_crossmap_bin(crossmap_file_name):
+        with crossmap_bin.CrossmapReader(crossmap_file_name) as reader:
+            for hash, translated_hash in reader:
+                crossmap[hash] = CrossmapEntry(translated_hash)
+        return
+
+    data = open(crossmap_file_name).readlines()
     for item in data:
         translation = item.split(",")
         crossmap[int(translation[0], 16)] = CrossmapEntry(int(translation[1], 16))
@@ -58,36 +96,89 @@ def load_crossmap_data():
 def load_natives_data():
     global natives
 
-    data = json.load(open("natives.json"))
+    natives.clear()
+    data = json.load(open(natives_json_file_name))
     for ns, natives_list in data.items():
         natives[ns] = []
         for hash_str, native_data in natives_list.items():
             natives[ns].append(NativeFunc(ns, native_data["name"], int(hash_str, 16), native_data["params"], native_data["return_type"]))
 
+def load_call_profile():
+    """Loads the call counts of `call_profile_file_name`, one native per line:
+    `<NAMESPACE::NAME, NAME or 0xHASH>,<call count>[,...]`, extra columns and lines starting with # are ignored."""
+    global call_profile
+
+    call_profile.clear()
+    if call_profile_file_name is None:
+        return
+
+    hashes_by_name = {}
+    for ns, nvs in natives.items():
+        for native in nvs:
+            hashes_by_name[f"{ns}::{native.name}"] = native.hash
+            hashes_by_name.setdefault(native.name, native.hash)
+
+    for line in open(call_profile_file_name).readlines():
+        line = line.split("#", 1)[0].strip()
+        if len(line) == 0:
+            continue
+
+        fields = line.split(",")
+        name = fields[0].strip()
+        try:
+            count = int(fields[1])
+            hash = int(name, 16) if name.lower().startswith("0x") else None
+        except (IndexError, ValueError):
+            print(f"Ignoring malformed line '{line}' in {call_profile_file_name}")
+            continue
+        if hash is None:
+            if name not in hashes_by_name:
+                print(f"Ignoring unknown native {name} in {call_profile_file_name}")
+                continue
+            hash = hashes_by_name[name]
+
+        call_profile[hash] = call_profile.get(hash, 0) + count
+
 def allocate_indices():
     global current_idx, crossmap_hash_list
 
+    current_idx = 0
+    crossmap_hash_list = []
+
+    indexed_natives = []
     for _, n in natives.items():
         for native in n:
-            hash = native.hash
-            if hash in crossmap:
-                crossmap[hash].native_index = current_idx
-                native.native_index = current_idx
-                crossmap_hash_list.append(crossmap[hash].hash)
-                current_idx += 1
+            native.native_index = -1
+            if native.hash in crossmap:
+                indexed_natives.append(native)
+
+    # Hottest natives first so their handlers share cache lines at the front of native_invoker::m_handlers,
+    # the sort is stable so the rest keeps the natives.json order.
+    if len(call_profile) > 0:
+        indexed_natives.sort(key=lambda native: -call_profile.get(native.hash, 0))
 
+    for native in indexed_natives:
+        hash = native.hash
+        crossmap[hash].native_index = current_idx
+        native.native_index = current_idx
+        crossmap_hash_list.append(crossmap[hash].hash)
+        current_idx += 1
 
-def write_crossmap_header():
-        open("crossmap.hpp", "w+").write(f"""#pragma once
+
+def render_crossmap_header():
+    return f"""#pragma once
 #include <script/scrNativeHandler.hpp>
 
 namespace big
 {{
 	constexpr std::array<rage::scrNativeHash, {len(crossmap_hash_list)}> g_crossmap = {{{",".join([f"0x{x:X}" for x in crossmap_hash_list])}}};
 }}
-""")
+"""
+
+def render_natives_header():
+    if compact_natives:
+        return render_compact_natives_header()
 
-def write_natives_header():
     natives_buf = ""
     natives_index_buf = ""
 
@@ -103,7 +194,7 @@ def write_natives_header():
     
     natives_buf = natives_buf[:-2]
 
-    open("../natives.hpp", "w+").write(f"""#pragma once
+    return f"""#pragma once
 #include "invoker/invoker.hpp"
 
 // clang-format off
@@ -113,11 +204,135 @@ enum class NativeIndex
 
 {natives_buf}
 // clang-format on
-""")
-    
+"""
+
+def render_compact_natives_header():
+    # Same API as the expanded header: NativeIndex, and a NAMESPACE::NAME callable per native
+    # taking the same parameters, as a constexpr function object.
+    return """#pragma once
+#include "invoker/invoker.hpp"
+
+// Generated with generate_natives.py --compact-natives, the natives are listed in natives_table.hpp.
+namespace big
+{
+	template<int index, bool fix_vectors, typename Signature>
+	struct native_function;
+
+	template<int index, bool fix_vectors, typename Ret, typename... Args>
+	struct native_function<index, fix_vectors, Ret(Args...)>
+	{
+		FORCEINLINE constexpr Ret operator()(Args... args) const
+		{
+			return big::native_invoker::invoke<index, fix_vectors, Ret>(args...);
+		}
+	};
+}
+
+// clang-format off
+enum class NativeIndex
+{
+#define NATIVE_NAMESPACE_BEGIN(ns)
+#define NATIVE_NAMESPACE_END()
+#define NATIVE(name, index, fix_vectors, ret, ...) name = index,
+#include "natives_table.hpp"
+};
+
+#define NATIVE_NAMESPACE_BEGIN(ns) namespace ns {
+#define NATIVE_NAMESPACE_END() }
+#define NATIVE(name, index, fix_vectors, ret, ...) inline constexpr big::native_function<index, fix_vectors, ret(__VA_ARGS__)> name{};
+#include "natives_table.hpp"
+// clang-format on
+"""
+
+def render_natives_table():
+    """The natives as an X-macro table, None when not emitting the compact header."""
+    if not compact_natives:
+        return None
+
+    table_buf = ""
+    for ns, nvs in natives.items():
+        table_buf += f"NATIVE_NAMESPACE_BEGIN({ns})\n"
+        for nat_data in nvs:
+            if nat_data.native_index == -1:
+                continue
+
+            table_buf += f"{nat_data.get_native_row_str()}\n"
+        table_buf += "NATIVE_NAMESPACE_END()\n"
+
+    return f"""// Generated with generate_natives.py --compact-natives, no include guard on purpose.
+// Define NATIVE_NAMESPACE_BEGIN(namespace), NATIVE_NAMESPACE_END() and
+// NATIVE(name, index, fix vectors, return type, parameters...) before including it, they are undefined at the end.
+
+// clang-format off
+{table_buf}// clang-format on
+
+#undef NATIVE_NAMESPACE_BEGIN
+#undef NATIVE_NAMESPACE_END
+#undef NATIVE
+"""
+
+def write_crossmap_header(crossmap_header):
+    open(crossmap_header_file_name, "w+").write(crossmap_header)
+
+def write_natives_header(natives_header):
+    open(natives_header_file_name, "w+").write(natives_header)
+
+def write_natives_table(natives_table):
+    # Only the compact header includes the table, don't leave a stale one behind otherwise.
+    if natives_table is None:
+        if os.path.exists(natives_table_file_name):
+            os.remove(natives_table_file_name)
+        return
+    open(natives_table_file_name, "w+").write(natives_table)
+
+def add_call_profile_argument(parser):
+    parser.add_argument("--call-profile", metavar="FILE", help="order the native indices by the call counts in FILE, hottest first")
+
+def add_crossmap_argument(parser):
+    parser.add_argument("--crossmap", metavar="FILE", help="text or binary (see crossmap_bin.py) crossmap to use instead of crossmap.txt")
+
+def add_compact_natives_argument(parser):
+    parser.add_argument("--compact-natives", action="store_true", help="emit natives.hpp as an X-macro table of the natives (natives_table.hpp) instead of a function per native")
+
+def apply_arguments(args):
+    """Applies the options of the add_*_argument() helpers, those the parser doesn't have get their default."""
+    global call_profile_file_name, crossmap_file_name, compact_natives
+
+    call_profile = getattr(args, "call_profile", None)
+    crossmap = getattr(args, "crossmap", None)
+    call_profile_file_name = os.path.abspath(call_profile) if call_profile is not None else None
+    crossmap_file_name = os.path.abspath(crossmap) if crossmap is not None else default_crossmap_file_name
+    compact_natives = getattr(args, "compact_natives", False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates the natives.hpp and crossmap.hpp headers from natives.json and crossmap.txt.")
+    add_call_profile_argument(parser)
+    add_crossmap_argument(parser)
+    add_compact_natives_argument(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    apply_arguments(args)
+
+    profiler = Profiler.from_args(args)
+    profiler.start()
+
+    with profiler.stage("load"):
+        load_crossmap_data()
+        load_natives_data()
+        load_call_profile()
+    with profiler.stage("index"):
+        allocate_indices()
+    with profiler.stage("render"):
+        crossmap_header = render_crossmap_header()
+        natives_header = render_natives_header()
+        natives_table = render_natives_table()
+    with profiler.stage("write"):
+        write_crossmap_header(crossmap_header)
+        write_natives_header(natives_header)
+        write_natives_table(natives_table)
+
+    profiler.report()
+
 if __name__ == "__main__":
-    load_crossmap_data()
-    load_natives_data()
-    allocate_indices()
-    write_crossmap_header()
-    write_natives_header()
\ No newline at end of file
+    main()
@@ -0,0 +1,578 @@
+-- Offline stand-in for the Lua environment of YimMenu, runs on plain Lua 5.4.
+-- It provides the native namespace tables generated in natives.lua (see lua_mock_gen.py), vec3, joaat, log and a
+-- frame based script scheduler, and can record the native calls of a run with their results to replay them later.
+
+local mock = {
+	-- "stub", "record" or "replay"
+	mode = "stub",
+	-- How the natives return vec3s, from natives.lua
+	vector3_returns = "userdata",
+	-- Report arguments of the wrong type like sol does.
+	strict = true,
+	frame = 0,
+	time_ms = 0,
+	frame_ms = 16,
+	-- "NAMESPACE.name" -> { namespace, name, native, params, returns }
+	natives = {},
+	-- "NAMESPACE.name" -> function returning the results of the native
+	handlers = {},
+	-- "NAMESPACE.name" -> call count
+	calls = {},
+	total_calls = 0,
+	trace = {},
+	trace_position = 0,
+	-- Scripts still running, and every script registered with their CPU time.
+	scripts = {},
+	all_scripts = {},
+	errors = {},
+}
+
+local unpack = table.unpack
+local pack = table.pack
+
+-- vec3
+
+local vec3_mt = {}
+vec3_mt.__index = vec3_mt
+
+function vec3_mt.__tostring(v)
+	return string.format("(%f, %f, %f)", v.x, v.y, v.z)
+end
+
+function vec3_mt.__eq(a, b)
+	return a.x == b.x and a.y == b.y and a.z == b.z
+end
+
+vec3 = {}
+
+-- Both vec3.new(x, y, z) and vec3:new(x, y, z) work with sol.
+function vec3.new(x, y, z, w)
+	if x == vec3 then
+		x, y, z = y, z, w
+	end
+	return setmetatable({ x = (x or 0) + 0.0, y = (y or 0) + 0.0, z = (z or 0) + 0.0 }, vec3_mt)
+end
+
+local function is_vec3(value)
+	return getmetatable(value) == vec3_mt
+end
+
+-- Same hash as rage::joaat, as an unsigned 32 bits integer.
+function joaat(str)
+	local hash = 0
+	for i = 1, #str do
+		local c = str:byte(i)
+		if c >= 65 and c <= 90 then
+			c = c + 32
+		end
+		hash = (hash + c) & 0xFFFFFFFF
+		hash = (hash + (hash << 10)) & 0xFFFFFFFF
+		hash = hash ~ (hash >> 6)
+	end
+	hash = (hash + (hash << 3)) & 0xFFFFFFFF
+	hash = hash ~ (hash >> 11)
+	hash = (hash + (hash << 15)) & 0xFFFFFFFF
+	return hash
+end
+
+log = {}
+for _, level in ipairs({ "info", "warning", "debug" }) do
+	log[level] = function(...)
+		if mock.verbose then
+			local parts = {}
+			for i = 1, select("#", ...) do
+				parts[i] = tostring((select(i, ...)))
+			end
+			print("[" .. level .. "] " .. table.concat(parts, " "))
+		end
+	end
+end
+
+-- Natives
+
+local default_values = {
+	integer = function() return 0 end,
+	number = function() return 0.0 end,
+	boolean = function() return false end,
+	string = function() return "" end,
+	vec3 = function() return vec3.new(0.0, 0.0, 0.0) end,
+}
+
+local function check_argument(full_name, i, type_, value)
+	if type_ == "string" then
+		-- Bound as sol::stack_object, anything goes and non strings read as nullptr.
+		return
+	end
+	local ok
+	if type_ == "integer" or type_ == "number" then
+		ok = type(value) == "number"
+	elseif type_ == "boolean" then
+		ok = value == nil or type(value) == "boolean"
+	else
+		ok = is_vec3(value)
+	end
+	if not ok then
+		error(string.format("bad argument #%d to '%s' (%s expected, got %s)", i, full_name, type_, type(value)), 3)
+	end
+end
+
+local function default_results(spec)
+	local results = { n = #spec.returns }
+	for i, type_ in ipairs(spec.returns) do
+		results[i] = default_values[type_]()
+	end
+	return results
+end
+
+-- The results of a native are its return value then its out parameters, as vec3s whatever the bindings do with them.
+-- They get to the script like natives_gen.py --vector3-returns makes the bindings return them.
+local function push_results(spec, args, results)
+	if mock.vector3_returns == "userdata" or not spec.has_vec3_result then
+		return unpack(results, 1, results.n)
+	end
+
+	local values = { n = 0 }
+	for i = 1, results.n do
+		local value = results[i]
+		if spec.returns[i] ~= "vec3" then
+			values.n = values.n + 1
+			values[values.n] = value
+		elseif mock.vector3_returns == "multi" then
+			values[values.n + 1], values[values.n + 2], values[values.n + 3] = value.x, value.y, value.z
+			values.n = values.n + 3
+		else
+			-- into: the return value goes to the extra last argument, the out parameters to their own argument.
+			local target_index = spec.result_args[i]
+			local target = args[target_index]
+			if not is_vec3(target) then
+				error(string.format("bad argument #%d to '%s' (vec3 expected, got %s)", target_index, spec.full_name, type(target)), 2)
+			end
+			target.x, target.y, target.z = value.x, value.y, value.z
+		end
+	end
+	return unpack(values, 1, values.n)
+end
+
+local serialize_values
+
+-- Counts the call and returns its results, from the replayed trace, the handler or the defaults.
+local function get_results(spec, args)
+	local full_name = spec.full_name
+	mock.calls[full_name] = (mock.calls[full_name] or 0) + 1
+	mock.total_calls = mock.total_calls + 1
+
+	if mock.mode == "replay" then
+		return mock.replay_call(spec, args)
+	end
+
+	local results
+	local handler = mock.handlers[full_name]
+	if handler ~= nil then
+		results = pack(handler(unpack(args, 1, args.n)))
+		-- Missing results get the default value of their type, like an untouched out parameter.
+		for i, type_ in ipairs(spec.returns) do
+			if results[i] == nil then
+				results[i] = default_values[type_]()
+			end
+		end
+		results.n = #spec.returns
+	else
+		results = default_results(spec)
+	end
+
+	if mock.mode == "record" then
+		-- Serialized right away, the script may modify the vec3s it passed or got afterwards.
+		mock.trace[#mock.trace + 1] = "\t{ " .. string.format("%q", full_name) .. ", " .. serialize_values(args) .. ", " .. serialize_values(results) .. " },\n"
+	end
+
+	return results
+end
+
+local function call_native(spec, ...)
+	local args = pack(...)
+
+	if mock.strict then
+		for i, type_ in ipairs(spec.params) do
+			check_argument(spec.full_name, i, type_, args[i])
+		end
+	end
+
+	return push_results(spec, args, get_results(spec, args))
+end
+
+local function native(namespace, name, params, returns, native_name)
+	local spec = {
+		namespace = namespace,
+		name = name,
+		full_name = namespace .. "." .. name,
+		native = native_name or name,
+		params = {},
+		returns = returns,
+		-- Argument each result is written into with --vector3-returns into.
+		result_args = {},
+	}
+
+	local out_args = {}
+	for i, type_ in ipairs(params) do
+		if type_:sub(-1) == "*" then
+			type_ = type_:sub(1, -2)
+			out_args[#out_args + 1] = i
+		end
+		spec.params[i] = type_
+	end
+	local has_retval = #returns > #out_args
+	for i, type_ in ipairs(returns) do
+		spec.has_vec3_result = spec.has_vec3_result or type_ == "vec3"
+		if has_retval then
+			spec.result_args[i] = i == 1 and #params + 1 or out_args[i - 1]
+		else
+			spec.result_args[i] = out_args[i]
+		end
+	end
+
+	mock.natives[spec.full_name] = spec
+
+	local ns = _G[namespace]
+	if ns == nil then
+		ns = {}
+		_G[namespace] = ns
+	end
+	ns[name] = function(...)
+		return call_native(spec, ...)
+	end
+end
+
+-- NAME_ARRAY of natives_gen.py --arrays: the native is called for each handle of the first argument, as many calls in the
+-- stats and the traces, and each result comes back as an array, split in x, y and z arrays for the vec3s.
+local function native_array(namespace, name)
+	local spec = mock.natives[namespace .. "." .. name]
+	local full_name = spec.full_name .. "_ARRAY"
+
+	_G[namespace][name .. "_ARRAY"] = function(handles, ...)
+		local args = pack(nil, ...)
+		args.n = math.max(args.n, 1)
+
+		if mock.strict then
+			if type(handles) ~= "table" then
+				error(string.format("bad argument #1 to '%s' (table expected, got %s)", full_name, type(handles)), 2)
+			end
+			for i = 2, #spec.params do
+				check_argument(full_name, i, spec.params[i], args[i])
+			end
+		end
+
+		local arrays = {}
+		for _, type_ in ipairs(spec.returns) do
+			for _ = 1, type_ == "vec3" and 3 or 1 do
+				arrays[#arrays + 1] = {}
+			end
+		end
+
+		for index = 1, #handles do
+			args[1] = handles[index]
+			if mock.strict then
+				check_argument(full_name, 1, spec.params[1], args[1])
+			end
+
+			local results = get_results(spec, args)
+			local array_index = 1
+			for i, type_ in ipairs(spec.returns) do
+				local value = results[i]
+				if type_ == "vec3" then
+					arrays[array_index][index], arrays[array_index + 1][index], arrays[array_index + 2][index] = value.x, value.y, value.z
+					array_index = array_index + 3
+				else
+					arrays[array_index][index] = value
+					array_index = array_index + 1
+				end
+			end
+		end
+
+		return unpack(arrays)
+	end
+end
+
+-- Loads the natives generated by lua_mock_gen.py, natives.lua next to this file by default.
+function mock.load_natives(file_name)
+	local chunk = assert(loadfile(file_name))
+	local data = chunk()
+	mock.vector3_returns = data.vector3_returns
+	data.natives(native)
+	data.arrays(native_array)
+end
+
+-- Calls `handler` with the arguments of the native instead of returning default values, `full_name` is "NAMESPACE.name".
+-- It returns the results of the native: its return value then its out parameters.
+function mock.handle(full_name, handler)
+	if mock.natives[full_name] == nil then
+		error("unknown native " .. full_name, 2)
+	end
+	mock.handlers[full_name] = handler
+end
+
+-- Record / replay
+
+local function format_number(value)
+	if math.type(value) == "integer" then
+		return string.format("%d", value)
+	end
+	if value ~= value then
+		return "0/0"
+	elseif value == math.huge then
+		return "1/0"
+	elseif value == -math.huge then
+		return "-1/0"
+	end
+	local s = string.format("%.17g", value)
+	if not s:find("[%.eE]") then
+		s = s .. ".0"
+	end
+	return s
+end
+
+local function serialize(value)
+	local t = type(value)
+	if t == "nil" or t == "boolean" then
+		return tostring(value)
+	elseif t == "number" then
+		return format_number(value)
+	elseif t == "string" then
+		return string.format("%q", value)
+	elseif is_vec3(value) then
+		return "V(" .. format_number(value.x) .. ", " .. format_number(value.y) .. ", " .. format_number(value.z) .. ")"
+	end
+	-- Tables and functions passed as string parameters, only their type is kept.
+	return "U(" .. string.format("%q", t) .. ")"
+end
+
+function serialize_values(values)
+	local parts = { "n = " .. values.n }
+	for i = 1, values.n do
+		parts[#parts + 1] = serialize(values[i])
+	end
+	return "{ " .. table.concat(parts, ", ") .. " }"
+end
+
+local unserializable_mt = {}
+
+local function values_match(expected, actual)
+	if getmetatable(expected) == unserializable_mt then
+		return type(actual) == expected.type
+	elseif is_vec3(expected) then
+		return is_vec3(actual) and expected == actual
+	elseif type(expected) == "number" and type(actual) == "number" then
+		return expected == actual or (expected ~= expected and actual ~= actual)
+	end
+	return expected == actual
+end
+
+local function format_call(full_name, args)
+	local parts = {}
+	for i = 1, args.n do
+		parts[i] = serialize(args[i])
+	end
+	return full_name .. "(" .. table.concat(parts, ", ") .. ")"
+end
+
+function mock.record()
+	mock.mode = "record"
+	mock.trace = {}
+end
+
+-- Writes the native calls recorded since mock.record() as a Lua chunk.
+function mock.save_trace(file_name)
+	local f = assert(io.open(file_name, "w"))
+	f:write("-- Native call trace recorded by mock_host.lua: { native, arguments, results }\n")
+	f:write("return {\n")
+	for _, call in ipairs(mock.trace) do
+		f:write(call)
+	end
+	f:write("}\n")
+	f:close()
+end
+
+-- Plays the calls of a trace written by mock.save_trace() back: each native call has to match the next recorded call,
+-- native and arguments, and gets its recorded results.
+function mock.replay(file_name)
+	local env = {
+		V = function(x, y, z)
+			return vec3.new(x, y, z)
+		end,
+		U = function(type_)
+			return setmetatable({ type = type_ }, unserializable_mt)
+		end,
+	}
+	local chunk = assert(loadfile(file_name, "t", env))
+	mock.mode = "replay"
+	mock.trace = chunk()
+	mock.trace_position = 0
+end
+
+function mock.replay_call(spec, args)
+	local position = mock.trace_position + 1
+	local call = mock.trace[position]
+	if call == nil then
+		error(string.format("replay diverged at call %d: %s, the trace has %d calls", position, format_call(spec.full_name, args), #mock.trace), 3)
+	end
+
+	local matches = call[1] == spec.full_name and call[2].n == args.n
+	for i = 1, math.max(call[2].n, args.n) do
+		matches = matches and values_match(call[2][i], args[i])
+	end
+	if not matches then
+		error(string.format("replay diverged at call %d: expected %s, got %s", position, format_call(call[1], call[2]), format_call(spec.full_name, args)), 3)
+	end
+
+	mock.trace_position = position
+	return call[3]
+end
+
+-- Number of recorded calls a replay didn't reach.
+function mock.replay_remaining()
+	return #mock.trace - mock.trace_position
+end
+
+-- Stats
+
+-- { { native = "NAMESPACE::NAME", calls = n }, ... }, most called first.
+function mock.stats()
+	local stats = {}
+	for full_name, calls in pairs(mock.calls) do
+		local spec = mock.natives[full_name]
+		stats[#stats + 1] = { native = spec.namespace .. "::" .. spec.native, calls = calls }
+	end
+	table.sort(stats, function(a, b)
+		if a.calls ~= b.calls then
+			return a.calls > b.calls
+		end
+		return a.native < b.native
+	end)
+	return stats
+end
+
+-- Same format as native_probes.dump() without the ticks, usable as a --call-profile.
+function mock.dump_stats()
+	local lines = { "# native,calls" }
+	for _, stat in ipairs(mock.stats()) do
+		lines[#lines + 1] = stat.native .. "," .. stat.calls
+	end
+	return table.concat(lines, "\n") .. "\n"
+end
+
+function mock.reset_stats()
+	mock.calls = {}
+	mock.total_calls = 0
+end
+
+-- Scripts, ticked once per frame like the fibers of lua_module.
+
+local script_util = {}
+script_util.__index = script_util
+
+function script_util:yield()
+	return coroutine.yield(0)
+end
+
+function script_util:sleep(ms)
+	return coroutine.yield(ms)
+end
+
+local dummy_script_util = setmetatable({}, script_util)
+
+local function add_script(name, func, looped)
+	local s = { name = name, func = func, looped = looped, wake_ms = 0, cpu_time = 0.0 }
+	mock.scripts[#mock.scripts + 1] = s
+	mock.all_scripts[#mock.all_scripts + 1] = s
+end
+
+script = {}
+
+function script.register_looped(name, func)
+	add_script(name, func, true)
+end
+
+local fiber_count = 0
+
+function script.run_in_fiber(func)
+	add_script("fiber" .. fiber_count, func, false)
+	fiber_count = fiber_count + 1
+end
+
+function script.execute_as_script(script_name, func)
+	func()
+end
+
+local function tick_script(s)
+	if s.co == nil then
+		s.co = coroutine.create(s.func)
+	end
+
+	local start = os.clock()
+	local ok, ms = coroutine.resume(s.co, dummy_script_util)
+	s.cpu_time = s.cpu_time + (os.clock() - start)
+
+	if not ok then
+		mock.errors[#mock.errors + 1] = s.name .. ": " .. tostring(ms)
+		s.dead = true
+		return
+	end
+
+	if coroutine.status(s.co) == "dead" then
+		if s.looped then
+			-- Called again from the start next frame.
+			s.co = nil
+		else
+			s.dead = true
+		end
+		return
+	end
+
+	s.wake_ms = mock.time_ms + (math.type(ms) ~= nil and ms or 0)
+end
+
+-- Ticks the registered scripts `count` times, advancing the game time by frame_ms each time.
+function mock.run_frames(count)
+	for _ = 1, count do
+		mock.frame = mock.frame + 1
+		mock.time_ms = mock.time_ms + mock.frame_ms
+
+		local alive = {}
+		-- Scripts registered during the frame start on the next one.
+		local scripts = mock.scripts
+		mock.scripts = {}
+		for _, s in ipairs(scripts) do
+			if mock.time_ms >= s.wake_ms then
+				tick_script(s)
+			end
+			if not s.dead then
+				alive[#alive + 1] = s
+			end
+		end
+		for _, s in ipairs(mock.scripts) do
+			alive[#alive + 1] = s
+		end
+		mock.scripts = alive
+	end
+end
+
+-- Game clock of the mock, the handlers set afterwards take precedence.
+local function install_clock_handlers()
+	local clock = {
+		["MISC.GET_GAME_TIMER"] = function() return mock.time_ms end,
+		["MISC.GET_FRAME_COUNT"] = function() return mock.frame end,
+		["MISC.GET_FRAME_TIME"] = function() return mock.frame_ms / 1000 end,
+		["MISC.TIMESTEP"] = function() return mock.frame_ms / 1000 end,
+	}
+	for full_name, handler in pairs(clock) do
+		if mock.natives[full_name] ~= nil then
+			mock.handlers[full_name] = handler
+		end
+	end
+end
+
+function mock.init(natives_file_name)
+	mock.load_natives(natives_file_name)
+	install_clock_handlers()
+end
+
+return mock
@@ -0,0 +1,137 @@
+-- lua ./run.lua [options] script.lua...
+-- Runs Lua scripts against the offline mock host and reports their CPU time and native calls.
+
+local usage = [[
+usage: lua run.lua [options] script.lua...
+
+Runs the scripts (in order, like the scripts folder of YimMenu) against the mock natives, then ticks their
+registered scripts for a number of frames.
+
+options:
+  --frames N         frames to tick the registered scripts for (default: 1000)
+  --frame-ms MS      game time between two frames (default: 16)
+  --handlers FILE    Lua file run before the scripts, `mock` is a global there, e.g.
+                     mock.handle("PLAYER.PLAYER_PED_ID", function() return 1 end)
+  --record FILE      write the native calls and their results to FILE
+  --replay FILE      return the results recorded in FILE, failing on the first call that differs
+  --stats FILE       write the native call counts as CSV, usable as a --call-profile
+  --natives FILE     natives generated by lua_mock_gen.py (default: natives.lua next to run.lua)
+  --lenient          don't report arguments of the wrong type
+  --verbose          print the log.info/warning/debug calls]]
+
+local folder = arg[0]:match("^(.*)[/\\]") or "."
+package.path = folder .. "/?.lua;" .. package.path
+
+local options = { frames = 1000, frame_ms = 16, natives = folder .. "/natives.lua", scripts = {} }
+local i = 1
+while i <= #arg do
+	local a = arg[i]
+	local function value()
+		i = i + 1
+		if arg[i] == nil then
+			io.stderr:write(a .. " expects a value\n" .. usage .. "\n")
+			os.exit(2)
+		end
+		return arg[i]
+	end
+
+	if a == "--frames" then
+		options.frames = math.tointeger(tonumber(value()))
+	elseif a == "--frame-ms" then
+		options.frame_ms = tonumber(value())
+	elseif a == "--handlers" then
+		options.handlers = value()
+	elseif a == "--record" then
+		options.record = value()
+	elseif a == "--replay" then
+		options.replay = value()
+	elseif a == "--stats" then
+		options.stats = value()
+	elseif a == "--natives" then
+		options.natives = value()
+	elseif a == "--lenient" then
+		options.lenient = true
+	elseif a == "--verbose" then
+		options.verbose = true
+	elseif a == "--help" or a == "-h" then
+		print(usage)
+		os.exit(0)
+	elseif a:sub(1, 2) == "--" then
+		io.stderr:write("unknown option " .. a .. "\n" .. usage .. "\n")
+		os.exit(2)
+	else
+		options.scripts[#options.scripts + 1] = a
+	end
+	i = i + 1
+end
+
+if #options.scripts == 0 or options.frames == nil or options.frame_ms == nil or (options.record and options.replay) then
+	io.stderr:write(usage .. "\n")
+	os.exit(2)
+end
+
+local mock = require("mock_host")
+mock.init(options.natives)
+mock.frame_ms = options.frame_ms
+mock.strict = not options.lenient
+mock.verbose = options.verbose
+
+if options.handlers then
+	_G.mock = mock
+	dofile(options.handlers)
+end
+
+if options.record then
+	mock.record()
+elseif options.replay then
+	mock.replay(options.replay)
+end
+
+local start = os.clock()
+local load_time = 0.0
+for _, file_name in ipairs(options.scripts) do
+	local chunk_start = os.clock()
+	local ok, err = pcall(dofile, file_name)
+	load_time = load_time + (os.clock() - chunk_start)
+	if not ok then
+		mock.errors[#mock.errors + 1] = file_name .. ": " .. tostring(err)
+	end
+end
+
+local frames_start = os.clock()
+mock.run_frames(options.frames)
+local tick_time = os.clock() - frames_start
+local total_time = os.clock() - start
+
+if options.record then
+	mock.save_trace(options.record)
+end
+
+print(string.format("%d frames of %g ms, %d scripts", options.frames, options.frame_ms, #mock.all_scripts))
+print(string.format("cpu time: %.3f ms total, %.3f ms loading the scripts, %.3f ms ticking", total_time * 1000, load_time * 1000, tick_time * 1000))
+for _, s in ipairs(mock.all_scripts) do
+	print(string.format("  %-32s %10.3f ms", s.name, s.cpu_time * 1000))
+end
+
+local stats = mock.stats()
+print(string.format("native calls: %d to %d natives", mock.total_calls, #stats))
+for j = 1, math.min(#stats, 20) do
+	print(string.format("  %-48s %10d", stats[j].native, stats[j].calls))
+end
+
+if options.stats then
+	local f = assert(io.open(options.stats, "w"))
+	f:write(mock.dump_stats())
+	f:close()
+end
+
+local failed = false
+if options.replay and mock.replay_remaining() > 0 then
+	print(string.format("replay: %d recorded calls weren't made", mock.replay_remaining()))
+	failed = true
+end
+for _, err in ipairs(mock.errors) do
+	print("error: " .. err)
+	failed = true
+end
+os.exit(failed and 1 or 0)
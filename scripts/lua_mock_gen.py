@@ -0,0 +1,100 @@
+# python ./lua_mock_gen.py
+
+import argparse
+import os
+
+import generate_natives
+import natives_doc_gen
+import natives_gen
+from gen_profiler import Profiler, add_profile_arguments
+
+lua_mock_folder = os.path.join(generate_natives.scripts_folder, "lua_mock")
+mock_natives_file_name = os.path.join(lua_mock_folder, "natives.lua")
+
+
+def get_lua_type(arg):
+    # Plain Lua types, the mock checks the arguments like sol would and builds default results from them.
+    return natives_doc_gen.lua_types.get(arg.type_no_star, "integer")
+
+
+def render_native_row(native_func):
+    # Pointer parameters are marked with a *, their value is also returned after the call.
+    params = ", ".join(f'"{get_lua_type(arg)}{"*" if arg.is_pointer_arg else ""}"' for arg in native_func.args)
+    returns = ", ".join(f'"{get_lua_type(out_param)}"' for out_param in native_func.out_params)
+    s = f'\t\tnative("{native_func.namespace}", "{native_func.lua_name}", {{{params}}}, {{{returns}}}'
+    if native_func.cpp_name != native_func.lua_name:
+        s += f', "{native_func.cpp_name}"'
+    s += ")\n"
+    return s
+
+
+def render_mock_natives(functions_per_namespaces):
+    # Its own selection rather than natives_gen.array_natives, see resolve_array_annotations().
+    array_natives = natives_gen.resolve_array_annotations(functions_per_namespaces, natives_gen.load_array_annotations())
+
+    s = ""
+    s += "-- Generated by lua_mock_gen.py from src/natives.hpp, do not edit.\n"
+    s += "-- native(namespace, lua name, parameter types (* for the pointers), return value types[, native name]), see mock_host.lua.\n"
+    s += "return {\n"
+    # Same as the bindings, see natives_gen.py --vector3-returns.
+    s += f'\tvector3_returns = "{natives_gen.vector3_returns}",\n'
+    s += "\tnatives = function(native)\n"
+    for native_funcs in functions_per_namespaces.values():
+        for native_func in native_funcs:
+            s += render_native_row(native_func)
+    s += "\tend,\n"
+    # The NAME_ARRAY forms of natives_gen.py --arrays, see native_array() in mock_host.lua.
+    s += "\tarrays = function(native_array)\n"
+    for native_funcs in functions_per_namespaces.values():
+        for native_func in native_funcs:
+            if (native_func.namespace, native_func.cpp_name) in array_natives:
+                s += f'\t\tnative_array("{native_func.namespace}", "{native_func.lua_name}")\n'
+    s += "\tend,\n"
+    s += "}\n"
+
+    print(f"Wrote mock for {sum(len(f) for f in functions_per_namespaces.values())} native functions")
+
+    return s
+
+
+def write_mock_natives(content):
+    """Writes lua_mock/natives.lua unless it already has `content`, returns the files written."""
+    if os.path.exists(mock_natives_file_name):
+        with open(mock_natives_file_name, "r") as f:
+            if f.read() == content:
+                return []
+    with open(mock_natives_file_name, "w") as f:
+        f.write(content)
+    return [mock_natives_file_name]
+
+
+def generate_mock_natives():
+    with open(natives_gen.natives_hpp_file_name, "r") as natives_hpp:
+        functions_per_namespaces = natives_gen.get_natives_func_from_natives_hpp_file(natives_hpp)
+    return write_mock_natives(render_mock_natives(functions_per_namespaces))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates lua_mock/natives.lua, the natives of src/natives.hpp for the offline mock host.")
+    natives_gen.add_binding_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    natives_gen.apply_binding_arguments(args)
+
+    profiler = Profiler.from_args(args)
+    profiler.start()
+
+    with profiler.stage("load"):
+        with open(natives_gen.natives_hpp_file_name, "r") as natives_hpp:
+            functions_per_namespaces = natives_gen.get_natives_func_from_natives_hpp_file(natives_hpp)
+    with profiler.stage("render"):
+        content = render_mock_natives(functions_per_namespaces)
+    with profiler.stage("write"):
+        write_mock_natives(content)
+
+    profiler.report()
+
+
+if __name__ == "__main__":
+    main()
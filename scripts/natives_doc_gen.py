@@ -0,0 +1,269 @@
+# python ./natives_doc_gen.py
+
+import argparse
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_natives
+import natives_gen
+from gen_profiler import Profiler, add_profile_arguments
+
+natives_docs_folder = os.path.normpath(os.path.join(generate_natives.scripts_folder, "..", "docs", "lua", "natives"))
+state_file_name = os.path.join(generate_natives.scripts_folder, ".natives_doc_state.json")
+
+# Namespaces with more natives than this are split in balanced shards, so no page gets too big to load.
+max_natives_per_page = 200
+
+# Lua type of the values the bindings take and return, by natives_gen.Arg type (without the pointer).
+lua_types = {
+    "bool": "boolean",
+    "float": "number",
+    "sol::stack_object": "string",
+    "const char*": "string",
+    "Vector3": "vec3",
+}
+
+
+def get_lua_type(arg):
+    type_ = lua_types.get(arg.type_no_star, "integer")
+    # Keep the native type for the aliases, an integer being a Ped or a Hash is the interesting part.
+    raw_type = arg.raw_type.replace("*", "")
+    if type_ == "integer" and raw_type != "int":
+        type_ += f" ({raw_type})"
+    return type_
+
+
+def load_bound_natives():
+    """Returns the natives.json data of the natives that have a Lua binding, per namespace, in natives.json order."""
+    natives_per_namespace = {}
+    with open(generate_natives.natives_json_file_name, "r") as f:
+        data = json.load(f)
+    for namespace_name, natives in data.items():
+        natives_per_namespace[namespace_name] = [
+            (hash_str, native)
+            for hash_str, native in natives.items()
+            if int(hash_str, 16) in generate_natives.crossmap and native["name"] not in natives_gen.unbound_natives
+        ]
+    return natives_per_namespace
+
+
+def get_shards(natives, max_per_page):
+    # As many pages as needed, with sizes differing by one native at most.
+    count = max(1, math.ceil(len(natives) / max_per_page))
+    size, extra = divmod(len(natives), count)
+    shards = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(natives[start:end])
+        start = end
+    return shards
+
+
+def get_page_name(namespace_name, shard_index, shard_count):
+    if shard_count == 1:
+        return f"{namespace_name}.md"
+    return f"{namespace_name}_{shard_index + 1}.md"
+
+
+def render_native(namespace_name, hash_str, native):
+    args = [natives_gen.Arg(param["name"], param["type"]) for param in native["params"]]
+    func = natives_gen.NativeFunc(namespace_name, natives_gen.get_lua_name(native["name"]), native["name"], args, native["return_type"])
+    parameters_str = ", ".join(arg.name for arg in args)
+
+    s = ""
+    s += f"### `{func.lua_name}({parameters_str})`\n"
+    s += "\n"
+
+    if len(native["comment"]) > 0:
+        # The comments come from the native db as plain text, markdown would mangle their `#`, `*` and `_`.
+        s += "```text\n"
+        s += native["comment"].strip() + "\n"
+        s += "```\n"
+        s += "\n"
+
+    s += f"- **Hash:** `{hash_str}`, since build {native['build']}\n"
+    if len(native.get("old_names", [])) > 0:
+        s += f"- **Previously:** {', '.join(f'`{name}`' for name in native['old_names'])}\n"
+    s += "\n"
+
+    if len(args) > 0:
+        s += "- **Parameters:**\n"
+        for arg in args:
+            s += f"  - `{arg.name}` ({get_lua_type(arg)})"
+            s += ": in and out, returned after the call\n" if arg.is_pointer_arg else "\n"
+        s += "\n"
+
+    returns = []
+    if len(func.out_params) > 0:
+        s += "- **Returns:**\n"
+        for out_param in func.out_params:
+            returns.append(out_param.name)
+            s += f"  - `{out_param.name}` ({get_lua_type(out_param)})\n"
+        s += "\n"
+
+    s += "**Example Usage:**\n"
+    s += "```lua\n"
+    if len(returns) > 0:
+        s += f"local {', '.join(returns)} = "
+    s += f"{namespace_name}.{func.lua_name}({parameters_str})\n"
+    s += "```\n"
+    s += "\n"
+
+    return s
+
+
+def render_namespace(namespace_name, natives, max_per_page):
+    """Returns the pages of a namespace, {page name: content}. Runs in the process pool."""
+    shards = get_shards(natives, max_per_page)
+    pages = {}
+    for i, shard in enumerate(shards):
+        s = ""
+        if len(shards) == 1:
+            s += f"# Namespace: {namespace_name}\n"
+        else:
+            s += f"# Namespace: {namespace_name} ({i + 1}/{len(shards)})\n"
+        s += "\n"
+        s += f"Natives of the `{namespace_name}` table"
+        if len(shards) > 1:
+            s += f", from `{shard[0][1]['name']}` to `{shard[-1][1]['name']}`"
+            links = " ".join(f"[{j + 1}]({get_page_name(namespace_name, j, len(shards))})" for j in range(len(shards)))
+            s += f". Pages: {links}"
+        s += ".\n"
+        s += "\n"
+        s += f"## Natives ({len(shard)})\n"
+        s += "\n"
+        for hash_str, native in shard:
+            s += render_native(namespace_name, hash_str, native)
+        pages[get_page_name(namespace_name, i, len(shards))] = s
+    return pages
+
+
+def render_index(natives_per_namespace, max_per_page):
+    s = ""
+    s += "# Natives\n"
+    s += "\n"
+    s += f"The {sum(len(n) for n in natives_per_namespace.values())} natives callable from Lua, one table per namespace.\n"
+    s += "\n"
+    for namespace_name, natives in natives_per_namespace.items():
+        shards = get_shards(natives, max_per_page)
+        if len(shards) == 1:
+            s += f"- [{namespace_name}]({get_page_name(namespace_name, 0, 1)}) ({len(natives)})\n"
+            continue
+        s += f"- {namespace_name} ({len(natives)})\n"
+        for i, shard in enumerate(shards):
+            s += f"  - [{shard[0][1]['name']} to {shard[-1][1]['name']}]({get_page_name(namespace_name, i, len(shards))})\n"
+    return s
+
+
+def get_namespace_digest(namespace_name, natives, max_per_page, generator_digest):
+    data = json.dumps([namespace_name, natives, max_per_page, generator_digest], sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def get_generator_digest():
+    # Any change to the rendering code re-renders every namespace.
+    digest = hashlib.sha1()
+    for file_name in (natives_gen.__file__, __file__):
+        with open(file_name, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_state():
+    if not os.path.exists(state_file_name):
+        return {}
+    with open(state_file_name, "r") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    with open(state_file_name, "w") as f:
+        json.dump(state, f, indent=4, sort_keys=True)
+
+
+def generate_natives_docs(jobs=None, force=False):
+    """Renders the pages of the namespaces whose natives changed since the last run, returns the files written."""
+    natives_per_namespace = load_bound_natives()
+    generator_digest = get_generator_digest()
+    state = {} if force else load_state()
+
+    os.makedirs(natives_docs_folder, exist_ok=True)
+
+    expected_pages = {"index.md"}
+    to_render = []
+    new_state = {}
+    for namespace_name, natives in natives_per_namespace.items():
+        shard_count = len(get_shards(natives, max_natives_per_page))
+        pages = [get_page_name(namespace_name, i, shard_count) for i in range(shard_count)]
+        expected_pages.update(pages)
+
+        digest = get_namespace_digest(namespace_name, natives, max_natives_per_page, generator_digest)
+        new_state[namespace_name] = digest
+        if state.get(namespace_name) != digest or not all(os.path.exists(os.path.join(natives_docs_folder, page)) for page in pages):
+            to_render.append(namespace_name)
+
+    rendered = {}
+    if len(to_render) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(render_namespace, n, natives_per_namespace[n], max_natives_per_page) for n in to_render]
+            for future in futures:
+                rendered.update(future.result())
+    else:
+        for namespace_name in to_render:
+            rendered.update(render_namespace(namespace_name, natives_per_namespace[namespace_name], max_natives_per_page))
+    rendered["index.md"] = render_index(natives_per_namespace, max_natives_per_page)
+
+    written = []
+    for page, content in rendered.items():
+        file_name = os.path.join(natives_docs_folder, page)
+        if os.path.exists(file_name):
+            with open(file_name, "r") as f:
+                if f.read() == content:
+                    continue
+        with open(file_name, "w") as f:
+            f.write(content)
+        written.append(file_name)
+
+    # Pages of namespaces that are gone or got a different number of shards.
+    for page in os.listdir(natives_docs_folder):
+        if page.endswith(".md") and page not in expected_pages:
+            os.remove(os.path.join(natives_docs_folder, page))
+
+    save_state(new_state)
+
+    print(f"Rendered {len(to_render)} of {len(natives_per_namespace)} namespaces, wrote {len(written)} pages")
+
+    return written
+
+
+def main():
+    global max_natives_per_page
+
+    parser = argparse.ArgumentParser(description="Generates the native reference under docs/lua/natives/ from natives.json, one page per namespace.")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="processes rendering the namespaces (default: one per cpu)")
+    parser.add_argument("--force", action="store_true", help="render every namespace, even the unchanged ones")
+    parser.add_argument("--max-natives-per-page", type=int, default=max_natives_per_page, help="split the namespaces with more natives in balanced pages (default: %(default)s)")
+    generate_natives.add_crossmap_argument(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    max_natives_per_page = args.max_natives_per_page
+    generate_natives.apply_arguments(args)
+
+    profiler = Profiler.from_args(args)
+    profiler.start()
+
+    with profiler.stage("load"):
+        generate_natives.load_crossmap_data()
+    with profiler.stage("render"):
+        generate_natives_docs(args.jobs, args.force)
+
+    profiler.report()
+
+
+if __name__ == "__main__":
+    main()
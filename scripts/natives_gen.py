@@ -1,29 +1,84 @@
-# working dir: scripts
 # python ./natives_gen.py
 
+import argparse
+import fnmatch
+import io
 import os
-
-natives_hpp = open("../src/natives.hpp", "r")
-
-cpp_print_buf = ""
-hpp_print_buf = ""
-
-hpp_lua_native_wrappers_print_buf = ""
-
-
-def print_cpp(text):
-    global cpp_print_buf
-    cpp_print_buf += text + "\n"
-
-
-def print_hpp(text):
-    global hpp_print_buf
-    hpp_print_buf += text + "\n"
+import re
+import zlib
+
+import generate_natives
+from gen_profiler import Profiler, add_profile_arguments
+from gen_watch import add_watch_arguments, watch, write_changed_files
+
+natives_hpp_file_name = generate_natives.natives_header_file_name
+lua_natives_folder = os.path.join(generate_natives.src_folder, "lua", "natives")
+
+# Generator options, see add_binding_arguments().
+emit_probes = False
+share_signatures = False
+raw_cfunctions = False
+# How the Vector3 results get to Lua: "userdata" (a new vec3 per call), "multi" (three numbers) or "into" (written into a vec3 the caller passes).
+vector3_returns = "userdata"
+# Optional annotation file of the natives to memoize, see load_memo_annotations().
+memo_file_name = None
+
+default_memo_capacity = 256
+memo_annotations = {}
+# (namespace, cpp name) -> (policy, capacity) of the annotated natives that can be memoized.
+memoized_natives = {}
+
+# Packs the namespaces whose bindings are smaller than this many bytes in unity files, 0 for one file per namespace.
+unity_budget = 0
+# Optional config of the natives to also bind in array form, see load_array_annotations().
+arrays_file_name = None
+# (namespace, cpp name) of the natives getting an array form.
+array_natives = set()
+# First parameter types the patterns of the arrays config are restricted to.
+entity_handle_types = {"Entity", "Ped", "Vehicle", "Object"}
+
+
+# Aliases of the same integer types in script/types.hpp, natives only differing by them can share a wrapper.
+normalized_types = {
+    "Entity": "int",
+    "Player": "int",
+    "FireId": "int",
+    "Interior": "int",
+    "Ped": "int",
+    "Vehicle": "int",
+    "Cam": "int",
+    "Object": "int",
+    "Pickup": "int",
+    "Blip": "int",
+    "ScrHandle": "int",
+    "Any": "Hash",
+}
+
+
+# Natives only taking and returning these (normalized) types get a plain lua_CFunction with --raw-cfunctions.
+raw_argument_readers = {
+    "int": "raw_to_integer(L, {index})",
+    "Hash": "raw_to_integer(L, {index})",
+    "float": "lua_tonumber(L, {index})",
+    "BOOL": "lua_toboolean(L, {index})",
+}
+raw_return_pushers = {
+    "int": "lua_pushinteger",
+    "Hash": "lua_pushinteger",
+    "float": "lua_pushnumber",
+    "BOOL": "lua_pushboolean",
+}
+
+
+def normalize_type(type_):
+    # Pointers keep their own type, an Any* is passed through as an address while a Hash* is an out parameter.
+    return normalized_types.get(type_, type_)
 
 
 class Arg:
     def __init__(self, name, type_):
         self.name = name
+        self.raw_type = type_
         self.type_ = type_.replace("BOOL", "bool").replace("Any*", "uintptr_t")
         if self.type_ == "uintptr_t":
             self.is_any_ptr = True
@@ -42,11 +97,13 @@ class Arg:
 
 
 class NativeFunc:
-    def __init__(self, namespace, lua_name, cpp_name, args, return_type):
+    def __init__(self, namespace, lua_name, cpp_name, args, return_type, fix_vectors="false"):
         self.namespace = namespace
         self.lua_name = lua_name
         self.cpp_name = cpp_name
         self.args = args
+        self.raw_return_type = return_type
+        self.fix_vectors = fix_vectors
         self.return_type = return_type.replace("BOOL", "bool").replace("Any*", "uintptr_t")
 
         self.out_params = []
@@ -62,6 +119,276 @@ class NativeFunc:
                 self.out_params.append(arg)
 
     def __str__(self) -> str:
+        return self.get_wrapper_str(
+            "LUA_NATIVE_" + self.namespace + "_" + self.lua_name,
+            self.namespace + "::" + self.cpp_name + "(",
+            "NativeIndex::" + self.cpp_name,
+            False,
+        )
+
+    def get_signature_key(self):
+        # Natives with the same key get the exact same wrapper apart from the native they call.
+        key = normalize_type(self.raw_return_type) + "(" + ", ".join(normalize_type(arg.raw_type) for arg in self.args) + ")"
+        if self.fix_vectors == "true":
+            key += " fix_vectors"
+        return key
+
+    def get_signature_template_name(self):
+        prefix = "LUA_NATIVE_RAW_SIGNATURE_" if uses_raw_cfunction(self) else "LUA_NATIVE_SIGNATURE_"
+        return f"{prefix}{zlib.crc32(self.get_signature_key().encode()):08X}"
+
+    def get_signature_template_str(self):
+        # Generic parameter names, the natives sharing the template all have their own.
+        generic_func = NativeFunc(
+            self.namespace,
+            "",
+            "",
+            [Arg(f"arg{i}", normalize_type(arg.raw_type)) for i, arg in enumerate(self.args)],
+            normalize_type(self.raw_return_type),
+            self.fix_vectors,
+        )
+        callee = f"big::native_invoker::invoke<static_cast<int>(index), {self.fix_vectors}, {generic_func.raw_return_type}>("
+        if uses_raw_cfunction(self):
+            return "template<NativeIndex index>\n\tstatic " + generic_func.get_raw_wrapper_str(self.get_signature_template_name(), callee, "index")
+        return "template<NativeIndex index>\n\tstatic " + generic_func.get_wrapper_str(self.get_signature_template_name(), callee, "index", True)
+
+    def get_memo_wrapper_name(self):
+        return "LUA_NATIVE_MEMO_" + self.namespace + "_" + self.lua_name
+
+    def is_memo_eligible(self):
+        # The result has to be the only thing the native gives back, and the arguments have to make a key.
+        if self.return_type in ("void", "uintptr_t") or len(self.out_params) != 1:
+            return False
+        if self.uses_vector3_wrapper():
+            return False
+        return not any(arg.is_any_ptr for arg in self.args)
+
+    def get_memo_wrapper_str(self, policy, capacity):
+        """Wrapper looking the arguments up in a cache before calling the regular wrapper of the native."""
+        result_type = "const char*" if self.out_params[0].is_string else self.return_type
+        memo_type = "native_memo<" + ", ".join([result_type] + [arg.type_ for arg in self.args]) + ">"
+        memo_policy = "native_memo_policy::" + policy.replace("-", "_")
+
+        s = result_type + " " + self.get_memo_wrapper_name() + "(" + ", ".join(str(arg) for arg in self.args) + ")\n"
+        s += "\t{\n"
+        s += f"\t\tstatic {memo_type} memo(NativeIndex::{self.cpp_name}, {capacity}, {memo_policy});\n"
+        s += "\t\treturn memo.get(&LUA_NATIVE_" + self.namespace + "_" + self.lua_name + "".join(", " + arg.name for arg in self.args) + ");\n"
+        s += "\t}"
+        return s
+
+    def get_array_lua_name(self):
+        return self.lua_name + "_ARRAY"
+
+    def get_array_wrapper_name(self):
+        return "LUA_NATIVE_ARRAY_" + self.namespace + "_" + self.lua_name
+
+    def is_array_eligible(self):
+        # An integer handle first, something to give back, and the other arguments passed the same for every handle.
+        if len(self.args) == 0 or self.args[0].is_pointer_arg or normalize_type(self.args[0].raw_type) not in ("int", "Hash"):
+            return False
+        if len(self.out_params) == 0 or self.return_type == "uintptr_t":
+            return False
+        return not any(arg.is_any_ptr for arg in self.args)
+
+    def get_array_wrapper_str(self):
+        """Wrapper calling the native for each handle of a Lua array, the first argument,
+        and returning an array per result (three for a Vector3: x, y and z) in one crossing of the Lua boundary."""
+        params = ["sol::table handles"]
+        for arg in self.args[1:]:
+            params.append((arg.type_no_star if arg.is_pointer_arg else arg.type_) + " " + arg.name)
+        params.append("sol::this_state this_state")
+
+        # Lua array and value of each result, in the order of the out parameters.
+        results = []
+        if self.return_type != "void":
+            results.append(("retval", "retval", self.return_type))
+        for arg in self.args:
+            if arg.is_pointer_arg:
+                value = "(bool)" + arg.name + "_out" if arg.type_ == "bool*" else arg.name + "_out"
+                results.append((arg.name + "_values", value, arg.type_no_star))
+        arrays = []
+        for array_name, value, type_ in results:
+            if type_ == "Vector3":
+                arrays += [(array_name + "_" + c, value + "." + c) for c in ("x", "y", "z")]
+            else:
+                arrays.append((array_name + "s" if array_name == "retval" else array_name, value))
+
+        call_args = [f"handles.raw_get<{self.args[0].raw_type}>(handle_index)"]
+        for arg in self.args[1:]:
+            if arg.is_pointer_arg:
+                call_args.append("&" + arg.name + "_out")
+            elif arg.is_string:
+                call_args.append(f"{arg.name}.is<const char*>() ? {arg.name}.as<const char*>() : nullptr")
+            else:
+                call_args.append(arg.name)
+
+        return_type = "sol::table" if len(arrays) == 1 else "std::tuple<" + ", ".join(["sol::table"] * len(arrays)) + ">"
+
+        s = return_type + " " + self.get_array_wrapper_name() + "(" + ", ".join(params) + ")\n"
+        s += "\t{\n"
+        s += "\t\tsol::state_view lua(this_state);\n"
+        s += "\t\tconst auto handle_count = static_cast<int>(handles.size());\n"
+        for array_name, _ in arrays:
+            s += f"\t\tauto {array_name} = lua.create_table(handle_count, 0);\n"
+        s += "\t\tfor (int handle_index = 1; handle_index <= handle_count; handle_index++)\n"
+        s += "\t\t{\n"
+        if emit_probes:
+            s += "\t\t\tLUA_NATIVE_PROBE(NativeIndex::" + self.cpp_name + ");\n\n"
+        for arg in self.args[1:]:
+            if arg.is_pointer_arg:
+                # The native writes through it, every handle starts from the value passed. A BOOL* gets a whole BOOL, not a bool.
+                s += f"\t\t\t{'BOOL' if arg.type_ == 'bool*' else 'auto'} {arg.name}_out = {arg.name};\n"
+        call_native = self.namespace + "::" + self.cpp_name + "(" + ", ".join(call_args) + ")"
+        if self.return_type == "void":
+            s += "\t\t\t" + call_native + ";\n"
+        elif self.return_type == "bool":
+            s += "\t\t\tauto retval = (bool)" + call_native + ";\n"
+        else:
+            s += "\t\t\tauto retval = " + call_native + ";\n"
+        for array_name, value in arrays:
+            s += f"\t\t\t{array_name}.raw_set(handle_index, {value});\n"
+        s += "\t\t}\n"
+        if len(arrays) == 1:
+            s += "\t\treturn " + arrays[0][0] + ";\n"
+        else:
+            s += "\t\treturn {" + ", ".join(array_name for array_name, _ in arrays) + "};\n"
+        s += "\t}"
+
+        return s
+
+    def get_raw_wrapper_name(self):
+        return "LUA_NATIVE_RAW_" + self.namespace + "_" + self.lua_name
+
+    def is_raw_eligible(self):
+        return_type = normalize_type(self.raw_return_type)
+        if return_type != "void" and return_type not in raw_return_pushers:
+            return False
+        return all(normalize_type(arg.raw_type) in raw_argument_readers for arg in self.args)
+
+    def get_raw_wrapper_str(self, function_name, callee, native_index):
+        """Plain lua_CFunction reading the arguments straight off the Lua stack, skipping sol's call machinery.
+        The arguments are always cast to the native parameter types, see get_wrapper_str()."""
+        s = "int " + function_name + "(lua_State* L)\n"
+        s += "\t{\n"
+
+        if emit_probes:
+            s += "\t\tLUA_NATIVE_PROBE(" + native_index + ");\n\n"
+
+        call_native = callee
+        for i, arg in enumerate(self.args):
+            call_native += "(" + arg.raw_type + ")" + raw_argument_readers[normalize_type(arg.raw_type)].format(index=i + 1) + ", "
+        if len(self.args) > 0:
+            call_native = call_native[:-2]
+        call_native += ")"
+
+        return_type = normalize_type(self.raw_return_type)
+        if return_type == "void":
+            s += "\t\t" + call_native + ";\n"
+            s += "\t\treturn 0;\n"
+        else:
+            s += "\t\t" + raw_return_pushers[return_type] + "(L, " + call_native + ");\n"
+            s += "\t\treturn 1;\n"
+
+        s += "\t}"
+
+        return s
+
+    def uses_vector3_wrapper(self):
+        return vector3_returns != "userdata" and any(out_param.type_no_star == "Vector3" for out_param in self.out_params)
+
+    def get_call_args_str(self, cast_args):
+        s = ""
+        for arg in self.args:
+            if arg.is_any_ptr:
+                s += "(Any*)"
+            elif cast_args and not arg.is_pointer_arg and not arg.is_string and arg.type_ != arg.raw_type:
+                s += "(" + arg.raw_type + ")"
+
+            if arg.is_pointer_arg:
+                if arg.type_ == "bool*":
+                    s += "(BOOL*)"
+                s += "&"
+
+            if arg.is_string:
+                s += f"{arg.name}.is<const char*>() ? {arg.name}.as<const char*>() : nullptr, "
+            else:
+                s += arg.name + ", "
+        return s[:-2]
+
+    def get_vector3_wrapper_str(self, function_name, callee, native_index, cast_args):
+        """Wrapper of a native with Vector3 results that doesn't push them as new vec3 userdata:
+        with --vector3-returns multi each Vector3 is returned as three numbers, with into the caller passes the vec3s
+        to write them into, a Vector3 pointer parameter becomes a reference and a Vector3 return value an extra `into` parameter."""
+        params = []
+        for arg in self.args:
+            if not arg.is_pointer_arg:
+                params.append(arg.type_ + " " + arg.name)
+            elif vector3_returns == "into" and arg.type_no_star == "Vector3":
+                params.append("Vector3& " + arg.name)
+            else:
+                params.append(arg.type_no_star + " " + arg.name)
+
+        # Type and expression of each value left to return, in the order of the out parameters.
+        values = []
+        if self.return_type != "void":
+            if self.return_type == "Vector3":
+                if vector3_returns == "into":
+                    params.append("Vector3& into")
+                else:
+                    values.append(("Vector3", "retval"))
+            else:
+                values.append(("const char*" if self.out_params[0].is_string else self.return_type, "retval"))
+        for arg in self.args:
+            if arg.is_pointer_arg and not (vector3_returns == "into" and arg.type_no_star == "Vector3"):
+                values.append((arg.type_no_star, arg.name))
+
+        if vector3_returns == "multi":
+            expanded = []
+            for type_, expression in values:
+                if type_ == "Vector3":
+                    expanded += [("float", expression + ".x"), ("float", expression + ".y"), ("float", expression + ".z")]
+                else:
+                    expanded.append((type_, expression))
+            values = expanded
+
+        if len(values) == 0:
+            fixed_return = "void"
+        elif len(values) == 1:
+            fixed_return = values[0][0]
+        else:
+            fixed_return = "std::tuple<" + ", ".join(type_ for type_, _ in values) + ">"
+
+        s = fixed_return + " " + function_name + "(" + ", ".join(params) + ")\n"
+        s += "\t{\n"
+
+        if emit_probes:
+            s += "\t\tLUA_NATIVE_PROBE(" + native_index + ");\n\n"
+
+        call_native = callee + self.get_call_args_str(cast_args) + ")"
+        if self.return_type == "Vector3" and vector3_returns == "into":
+            s += "\t\tinto = " + call_native + ";\n"
+        elif self.return_type == "void":
+            s += "\t\t" + call_native + ";\n"
+        elif self.return_type in ("bool", "uintptr_t"):
+            s += "\t\tauto retval = (" + self.return_type + ")" + call_native + ";\n"
+        else:
+            s += "\t\tauto retval = " + call_native + ";\n"
+
+        if len(values) == 1:
+            s += "\t\treturn " + values[0][1] + ";\n"
+        elif len(values) > 1:
+            s += "\t\treturn {" + ", ".join(expression for _, expression in values) + "};\n"
+
+        s += "\t}"
+
+        return s
+
+    def get_wrapper_str(self, function_name, callee, native_index, cast_args):
+        """`callee` is the start of the native call, `cast_args` casts the arguments to the native parameter types
+        for callees that don't convert them on their own (the invoker pushes the arguments as they come)."""
+        if self.uses_vector3_wrapper():
+            return self.get_vector3_wrapper_str(function_name, callee, native_index, cast_args)
+
         s = ""
 
         returning_multiple_values = False
@@ -95,10 +422,7 @@ class NativeFunc:
         s += (
             fixed_return
             + " "
-            + "LUA_NATIVE_"
-            + self.namespace
-            + "_"
-            + self.lua_name
+            + function_name
             + "("
             + fixed_params
             + ")"
@@ -107,6 +431,9 @@ class NativeFunc:
         s += "\n"
         s += "\t{\n"
 
+        if emit_probes:
+            s += "\t\tLUA_NATIVE_PROBE(" + native_index + ");\n\n"
+
         if self.cpp_name == "ADD_OWNED_EXPLOSION":
             s+= "\t\tbig::explosion_anti_cheat_bypass::apply();\n\n"
 
@@ -124,14 +451,16 @@ class NativeFunc:
                 if self.return_type == "bool":
                     call_native += "(bool)"
 
-            call_native += self.namespace + "::" + self.cpp_name + "("
+            call_native += callee
         else:
-            call_native += self.namespace + "::" + self.cpp_name + "("
+            call_native += callee
 
         if len(self.args) > 0:
             for arg in self.args:
                 if arg.is_any_ptr:
                     call_native += "(Any*)"
+                elif cast_args and not arg.is_pointer_arg and not arg.is_string and arg.type_ != arg.raw_type:
+                    call_native += "(" + arg.raw_type + ")"
 
                 if arg.is_pointer_arg:
                     if arg.type_ == "bool*":
@@ -190,11 +519,56 @@ class NativeFunc:
         return s
 
 
+# Sol somehow choke on this, terrible software
+unbound_natives = {"DRAW_TEXTURED_POLY_WITH_THREE_COLOURS"}
+
+
+def get_lua_name(func_name):
+    lua_name = func_name
+    if lua_name.startswith('_'):
+        lua_name = lua_name.removeprefix("_")
+        lua_name = lua_name + "_"
+    return lua_name
+
+
+def get_natives_func_from_natives_table(natives_table):
+    """Natives of the X-macro table natives.hpp includes when generated with --compact-natives."""
+    functions_per_namespaces = {}
+    current_namespace = ""
+    for line in natives_table.readlines():
+        line = line.strip()
+        if line.startswith("NATIVE_NAMESPACE_BEGIN("):
+            current_namespace = line.removeprefix("NATIVE_NAMESPACE_BEGIN(").removesuffix(")")
+            functions_per_namespaces[current_namespace] = []
+        elif line.startswith("NATIVE("):
+            # NATIVE(name, index, fix vectors, return type, parameters...)
+            fields = [field.strip() for field in line.removeprefix("NATIVE(").removesuffix(")").split(",")]
+            func_name, fix_vectors, return_type = fields[0], fields[2], fields[3]
+            if func_name in unbound_natives:
+                continue
+
+            args = []
+            for arg in fields[4:]:
+                args.append(Arg(arg[arg.rfind(" ") :].strip(), arg[: arg.rfind(" ")].strip()))
+
+            native_func = NativeFunc(current_namespace, get_lua_name(func_name), func_name, args, return_type, fix_vectors)
+            functions_per_namespaces[current_namespace].append(native_func)
+
+    return functions_per_namespaces
+
+
 def get_natives_func_from_natives_hpp_file(natives_hpp):
     functions_per_namespaces = {}
     current_namespace = ""
     start_parsing = False
     for line in natives_hpp.readlines():
+        if line.strip() == '#include "natives_table.hpp"':
+            # natives.hpp includes the table twice, for NativeIndex and for the natives themselves.
+            if len(functions_per_namespaces) == 0:
+                with open(os.path.join(os.path.dirname(natives_hpp_file_name), "natives_table.hpp"), "r") as natives_table:
+                    functions_per_namespaces = get_natives_func_from_natives_table(natives_table)
+            continue
+
         if "namespace SYSTEM" not in line and not start_parsing:
             continue
         else:
@@ -221,8 +595,7 @@ def get_natives_func_from_natives_hpp_file(natives_hpp):
 
                     continue
 
-            # Sol somehow choke on this, terrible software
-            if func_name == "DRAW_TEXTURED_POLY_WITH_THREE_COLOURS":
+            if func_name in unbound_natives:
                 continue
 
             args = []
@@ -243,111 +616,865 @@ def get_natives_func_from_natives_hpp_file(natives_hpp):
                 line[: line.find(func_name)].replace("NATIVE_DECL", "").strip()
             )
 
-            lua_name = func_name
-            if lua_name.startswith('_'):
-                lua_name = lua_name.removeprefix("_")
-                lua_name = lua_name + "_"
+            lua_name = get_lua_name(func_name)
 
-            native_func = NativeFunc(current_namespace, lua_name, func_name, args, return_type)
+            fix_vectors = re.search(r"invoke<\d+, (true|false),", line).group(1)
+
+            native_func = NativeFunc(current_namespace, lua_name, func_name, args, return_type, fix_vectors)
 
             functions_per_namespaces[current_namespace].append(native_func)
 
     return functions_per_namespaces
 
 
-functions_per_namespaces = get_natives_func_from_natives_hpp_file(natives_hpp)
+def get_native_binding_namespace_includes(namespace_name, native_funcs):
+    includes = ['#include "lua_native_binding.hpp"\n', '#include "natives.hpp"\n']
+    if emit_probes:
+        includes.append('#include "lua_native_probes.hpp"\n')
+    if raw_cfunctions:
+        includes.append('#include "lua_native_raw.hpp"\n')
+    if share_signatures:
+        includes.append('#include "lua_native_signatures.hpp"\n')
+    if any(uses_memo(native_func) for native_func in native_funcs):
+        includes.append('#include "lua_native_memo.hpp"\n')
+    if namespace_name == "FIRE":
+        includes.append('#include "util/explosion_anti_cheat_bypass.hpp"\n')
+    return includes
 
-def generate_native_binding_cpp_and_hpp_files(functions_per_namespaces):
-    generated_function_name = "void init_native_binding(sol::state& L)"
 
-    print_hpp("#pragma once")
-    # print_hpp('#include "lua/sol.hpp"')
-    print_hpp("")
-    print_hpp("namespace lua::native")
-    print_hpp("{")
-    print_hpp("\t" + generated_function_name + ";")
-    print_hpp("")
-    for namespace_name, native_funcs in functions_per_namespaces.items():
-        print_hpp("\t" + "void init_native_binding_" + namespace_name + "(sol::state& L);")
-    print_hpp("}")
+def generate_native_binding_namespace_cpp(namespace_name, native_funcs):
+    """Returns the includes and the body of the binding file of a namespace, see render_native_binding_cpp()."""
+    return get_native_binding_namespace_includes(namespace_name, native_funcs), generate_native_binding_namespace_body(namespace_name, native_funcs)
 
-    print_cpp('#include "lua_native_binding.hpp"')
-    print_cpp("")
-    print_cpp("namespace lua::native")
-    print_cpp("{")
 
-    i = 0
+def render_native_binding_cpp(namespaces):
+    # Several namespaces make a unity file, each header is included once before all their bodies.
+    includes = []
+    for namespace_includes, _ in namespaces:
+        includes += [include for include in namespace_includes if include not in includes]
+    return "".join(includes) + "\n" + "\n".join(body for _, body in namespaces)
+
+
+def generate_native_binding_namespace_body(namespace_name, native_funcs):
+    file_buffer = ""
+
+    file_buffer += "namespace lua::native\n"
+    file_buffer += "{\n"
+
+    for native_func in native_funcs:
+        if uses_signature_template(native_func):
+            # The scalar form comes from the shared template, the array form is still its own wrapper.
+            pass
+        elif uses_raw_cfunction(native_func):
+            file_buffer += "\tstatic " + native_func.get_raw_wrapper_str(native_func.get_raw_wrapper_name(), native_func.namespace + "::" + native_func.cpp_name + "(", "NativeIndex::" + native_func.cpp_name) + "\n\n"
+        else:
+            file_buffer += "\tstatic " + str(native_func) + "\n\n"
+        if uses_memo(native_func):
+            file_buffer += "\tstatic " + native_func.get_memo_wrapper_str(*memoized_natives[(native_func.namespace, native_func.cpp_name)]) + "\n\n"
+        if uses_array(native_func):
+            file_buffer += "\tstatic " + native_func.get_array_wrapper_str() + "\n\n"
+
+    file_buffer += "\t" + "void init_native_binding_" + namespace_name + "(sol::state& L)\n"
+    file_buffer += "\t{\n"
+
+    file_buffer +=  "\t\tauto " + namespace_name + ' = L["' + namespace_name + '"].get_or_create<sol::table>();\n'
+
+    for native_func in native_funcs:
+        if uses_memo(native_func):
+            file_buffer += "\t\t" + namespace_name + '.set_function("' + native_func.lua_name + '", ' + native_func.get_memo_wrapper_name() + ");\n"
+        elif uses_raw_cfunction(native_func):
+            # Pushed as is with lua_pushcclosure, sol only sees a plain C function.
+            if uses_signature_template(native_func):
+                file_buffer += "\t\t" + namespace_name + '.set("' + native_func.lua_name + '", &' + native_func.get_signature_template_name() + "<NativeIndex::" + native_func.cpp_name + ">);\n"
+            else:
+                file_buffer += "\t\t" + namespace_name + '.set("' + native_func.lua_name + '", &' + native_func.get_raw_wrapper_name() + ");\n"
+        elif uses_signature_template(native_func):
+            file_buffer += "\t\t" + namespace_name + '.set_function("' + native_func.lua_name + '", &' + native_func.get_signature_template_name() + "<NativeIndex::" + native_func.cpp_name + ">);\n"
+        else:
+            file_buffer += "\t\t"+ namespace_name+ '.set_function("'+ native_func.lua_name+ '", '+ "LUA_NATIVE_"+ native_func.namespace+ "_"+ native_func.lua_name+ ");\n"
+        if uses_array(native_func):
+            file_buffer += "\t\t" + namespace_name + '.set_function("' + native_func.get_array_lua_name() + '", ' + native_func.get_array_wrapper_name() + ");\n"
+
+    file_buffer+= "\t}\n" 
+    file_buffer+= "}\n"
+
+    return file_buffer
+
+
+def uses_signature_template(native_func):
+    # ADD_OWNED_EXPLOSION has a custom body, the memoized natives call their own wrapper
+    return share_signatures and native_func.cpp_name != "ADD_OWNED_EXPLOSION" and not uses_memo(native_func)
+
+
+def uses_raw_cfunction(native_func):
+    # ADD_OWNED_EXPLOSION has a custom body
+    return raw_cfunctions and native_func.cpp_name != "ADD_OWNED_EXPLOSION" and native_func.is_raw_eligible() and not uses_memo(native_func)
+
+
+def uses_memo(native_func):
+    return (native_func.namespace, native_func.cpp_name) in memoized_natives
+
+
+def load_memo_annotations():
+    """Loads the natives to memoize from `memo_file_name`, one native per line:
+    `<pure or per-frame> <NAMESPACE::NAME or NAME> [max cached results]`, lines starting with # are ignored.
+    Pure natives are cached until evicted, per-frame ones until the next game frame."""
+    global memo_annotations
+
+    memo_annotations.clear()
+    if memo_file_name is None:
+        return
+
+    for line in open(memo_file_name).readlines():
+        line = line.split("#", 1)[0].strip()
+        if len(line) == 0:
+            continue
+
+        fields = line.split()
+        if fields[0] not in ("pure", "per-frame") or len(fields) > 3:
+            print(f"Ignoring malformed line '{line}' in {memo_file_name}")
+            continue
+        memo_annotations[fields[1]] = (fields[0], int(fields[2]) if len(fields) == 3 else default_memo_capacity)
+
 
+def resolve_memo_annotations(functions_per_namespaces):
+    global memoized_natives
+
+    memoized_natives = {}
+    if len(memo_annotations) == 0:
+        return
+
+    found = set()
     for namespace_name, native_funcs in functions_per_namespaces.items():
+        for native_func in native_funcs:
+            name = namespace_name + "::" + native_func.cpp_name
+            if name not in memo_annotations and native_func.cpp_name not in memo_annotations:
+                continue
+
+            found.add(name if name in memo_annotations else native_func.cpp_name)
+            if native_func.uses_vector3_wrapper():
+                print(f"Ignoring {name} in {memo_file_name}, natives with Vector3 results can only be memoized with --vector3-returns userdata")
+                continue
+            if not native_func.is_memo_eligible():
+                print(f"Ignoring {name} in {memo_file_name}, only natives returning a single value without pointer arguments can be memoized")
+                continue
+            memoized_natives[(namespace_name, native_func.cpp_name)] = memo_annotations.get(name, memo_annotations.get(native_func.cpp_name))
+
+    for name in memo_annotations.keys() - found:
+        print(f"Ignoring unknown native {name} in {memo_file_name}")
+
+
+def uses_array(native_func):
+    return (native_func.namespace, native_func.cpp_name) in array_natives
 
 
-        file_name_cpp = "../src/lua/natives/lua_native_binding_" + namespace_name + ".cpp"
-        if os.path.exists(file_name_cpp):
-            os.remove(file_name_cpp)
-        f = open(file_name_cpp, "a")
+def load_array_annotations():
+    """Loads the natives to also bind in array form from `arrays_file_name`, one per line: `NAMESPACE::NAME`, `NAME`
+    or a pattern of them with * and ?, lines starting with # are ignored.
+    Patterns only select the natives whose first parameter is an entity handle, names any native taking an integer first."""
+    array_annotations = []
+    if arrays_file_name is None:
+        return array_annotations
+
+    for line in open(arrays_file_name).readlines():
+        line = line.split("#", 1)[0].strip()
+        if len(line) == 0:
+            continue
+        if len(line.split()) != 1:
+            print(f"Ignoring malformed line '{line}' in {arrays_file_name}")
+            continue
+        array_annotations.append(line)
+    return array_annotations
 
-        file_buffer = ""
 
+def resolve_array_annotations(functions_per_namespaces, array_annotations):
+    """Returns the (namespace, cpp name) of the natives `array_annotations` select. The selection is returned rather
+    than stored, the pipeline renders the Lua mock while the bindings are being generated."""
+    array_natives = set()
+    if len(array_annotations) == 0:
+        return array_natives
 
-        file_buffer += '#include "lua_native_binding.hpp"\n'
-        file_buffer += '#include "natives.hpp"\n'
-        if namespace_name == "FIRE":
-            file_buffer += '#include "util/explosion_anti_cheat_bypass.hpp"\n'
-        file_buffer += "\n"
-        file_buffer += "namespace lua::native\n"
-        file_buffer += "{\n"
+    lua_names = {(namespace_name, f.lua_name) for namespace_name, native_funcs in functions_per_namespaces.items() for f in native_funcs}
 
+    found = set()
+    for namespace_name, native_funcs in functions_per_namespaces.items():
         for native_func in native_funcs:
-            file_buffer += "\tstatic " + str(native_func) + "\n\n"
+            name = namespace_name + "::" + native_func.cpp_name
+            for selector in array_annotations:
+                is_pattern = "*" in selector or "?" in selector
+                if not fnmatch.fnmatchcase(name if "::" in selector else native_func.cpp_name, selector):
+                    continue
+                if is_pattern and (not native_func.is_array_eligible() or native_func.args[0].raw_type not in entity_handle_types):
+                    continue
+
+                found.add(selector)
+                if not native_func.is_array_eligible():
+                    print(f"Ignoring {name} in {arrays_file_name}, only natives taking an integer first and returning something can have an array form")
+                elif (namespace_name, native_func.get_array_lua_name()) in lua_names:
+                    print(f"Ignoring {name} in {arrays_file_name}, {native_func.get_array_lua_name()} is already a native")
+                else:
+                    array_natives.add((namespace_name, native_func.cpp_name))
+                break
+
+    for selector in array_annotations:
+        if selector not in found:
+            print(f"Ignoring {selector} in {arrays_file_name}, it doesn't match any native")
 
-        file_buffer += "\t" + "void init_native_binding_" + namespace_name + "(sol::state& L)\n"
-        file_buffer += "\t{\n"
+    return array_natives
 
-        file_buffer +=  "\t\tauto " + namespace_name + ' = L["' + namespace_name + '"].get_or_create<sol::table>();\n'
 
+def generate_native_signatures_hpp(functions_per_namespaces):
+    templates = {}
+    natives_per_template = {}
+    for native_funcs in functions_per_namespaces.values():
         for native_func in native_funcs:
-            i += 1
-            file_buffer += "\t\t"+ namespace_name+ '.set_function("'+ native_func.lua_name+ '", '+ "LUA_NATIVE_"+ native_func.namespace+ "_"+ native_func.lua_name+ ");\n"
+            if not uses_signature_template(native_func):
+                continue
 
-        file_buffer+= "\t}\n" 
-        file_buffer+= "}\n"
+            name = native_func.get_signature_template_name()
+            if name not in templates:
+                templates[name] = native_func
+                natives_per_template[name] = 0
+            assert templates[name].get_signature_key() == native_func.get_signature_key(), f"signature name collision for {name}"
+            natives_per_template[name] += 1
+
+    s = ""
+    s += "#pragma once\n"
+    s += '#include "natives.hpp"\n'
+    if emit_probes:
+        s += '#include "lua_native_probes.hpp"\n'
+    if raw_cfunctions:
+        s += '#include "lua_native_raw.hpp"\n'
+    s += "\n"
+    s += "// One wrapper per native signature, the bindings register an instantiation per native.\n"
+    s += "namespace lua::native\n"
+    s += "{\n"
+    for name, native_func in templates.items():
+        s += f"\t// {native_func.get_signature_key()}, {natives_per_template[name]} natives\n"
+        s += "\t" + native_func.get_signature_template_str() + "\n\n"
+    s = s[:-1]
+    s += "}\n"
+
+    print(f"Shared {sum(natives_per_template.values())} native wrappers between {len(templates)} signatures")
+
+    return s
+
+
+def get_namespace_key(native_funcs):
+    # Everything a namespace binding file is generated from, used by the watch mode to skip unchanged namespaces.
+    return tuple(
+        (f.cpp_name, f.return_type, tuple((arg.name, arg.type_) for arg in f.args), memoized_natives.get((f.namespace, f.cpp_name)), uses_array(f))
+        for f in native_funcs
+    )
+
+
+def generate_native_binding_cpp_and_hpp_files(functions_per_namespaces, namespace_cache=None):
+    global array_natives
 
-        f.write(file_buffer)
-        f.close()
+    generated_function_name = "void init_native_binding(sol::state& L)"
+    files = {}
+
+    load_memo_annotations()
+    resolve_memo_annotations(functions_per_namespaces)
+    array_natives = resolve_array_annotations(functions_per_namespaces, load_array_annotations())
+
+    hpp_buf = ""
+    hpp_buf += "#pragma once\n"
+    # hpp_buf += '#include "lua/sol.hpp"\n'
+    hpp_buf += "\n"
+    hpp_buf += "namespace lua::native\n"
+    hpp_buf += "{\n"
+    hpp_buf += "\t" + generated_function_name + ";\n"
+    hpp_buf += "\n"
+    for namespace_name, native_funcs in functions_per_namespaces.items():
+        hpp_buf += "\t" + "void init_native_binding_" + namespace_name + "(sol::state& L);\n"
+    if emit_probes:
+        hpp_buf += "\n"
+        hpp_buf += "\tvoid init_native_probes(sol::state& L);\n"
+    if len(memoized_natives) > 0:
+        hpp_buf += "\n"
+        hpp_buf += "\tvoid init_native_memo(sol::state& L);\n"
+    hpp_buf += "}\n"
+
+    cpp_buf = ""
+    cpp_buf += '#include "lua_native_binding.hpp"\n'
+    cpp_buf += "\n"
+    cpp_buf += "namespace lua::native\n"
+    cpp_buf += "{\n"
 
-    print_cpp("\t" + generated_function_name)
-    print_cpp("\t{")
+    i = 0
 
+    namespaces = {}
     for namespace_name, native_funcs in functions_per_namespaces.items():
-        # call each binding functions inside generated_function_name
+        i += len(native_funcs)
 
-        print_cpp("\t\t" + "init_native_binding_" + namespace_name + "(L);")
+        if namespace_cache is None:
+            namespaces[namespace_name] = generate_native_binding_namespace_cpp(namespace_name, native_funcs)
+            continue
 
-    print_cpp("\t}")
-    print_cpp("}")
+        key = get_namespace_key(native_funcs)
+        if namespace_name not in namespace_cache or namespace_cache[namespace_name][0] != key:
+            namespace_cache[namespace_name] = (key, generate_native_binding_namespace_cpp(namespace_name, native_funcs))
+        namespaces[namespace_name] = namespace_cache[namespace_name][1]
 
-    print(f"Wrote binding for {i} native functions")
+    for file_name_cpp, namespace_names in get_binding_translation_units(namespaces).items():
+        files[os.path.join(lua_natives_folder, file_name_cpp)] = render_native_binding_cpp([namespaces[n] for n in namespace_names])
 
+    cpp_buf += "\t" + generated_function_name + "\n"
+    cpp_buf += "\t{\n"
 
-generate_native_binding_cpp_and_hpp_files(functions_per_namespaces)
+    for namespace_name, native_funcs in functions_per_namespaces.items():
+        # call each binding functions inside generated_function_name
 
-def write_cpp_code(cpp_print_buf):
-    file_name = "../src/lua/natives/lua_native_binding.cpp"
-    if os.path.exists(file_name):
-        os.remove(file_name)
-    f = open(file_name, "a")
-    f.write(cpp_print_buf)
-    f.close()
+        cpp_buf += "\t\t" + "init_native_binding_" + namespace_name + "(L);\n"
+
+    if emit_probes:
+        cpp_buf += "\n"
+        cpp_buf += "\t\tinit_native_probes(L);\n"
+    if len(memoized_natives) > 0:
+        cpp_buf += "\n"
+        cpp_buf += "\t\tinit_native_memo(L);\n"
+
+    cpp_buf += "\t}\n"
+    cpp_buf += "}\n"
+
+    files[os.path.join(lua_natives_folder, "lua_native_binding.cpp")] = cpp_buf
+    files[os.path.join(lua_natives_folder, "lua_native_binding.hpp")] = hpp_buf
+
+    if share_signatures:
+        files[os.path.join(lua_natives_folder, "lua_native_signatures.hpp")] = generate_native_signatures_hpp(functions_per_namespaces)
+    if raw_cfunctions:
+        files[os.path.join(lua_natives_folder, "lua_native_raw.hpp")] = generate_native_raw_hpp()
+        raw_count = sum(1 for native_funcs in functions_per_namespaces.values() for f in native_funcs if uses_raw_cfunction(f))
+        print(f"Bound {raw_count} natives as raw lua_CFunctions, {i - raw_count} through sol")
+    if len(memoized_natives) > 0:
+        files[os.path.join(lua_natives_folder, "lua_native_memo.hpp")] = generate_native_memo_hpp()
+        files[os.path.join(lua_natives_folder, "lua_native_memo.cpp")] = generate_native_memo_cpp()
+        print(f"Memoized {len(memoized_natives)} natives")
+    if len(array_natives) > 0:
+        print(f"Bound {len(array_natives)} natives in array form")
+    if emit_probes:
+        files[os.path.join(lua_natives_folder, "lua_native_probes.hpp")] = generate_native_probes_hpp()
+        files[os.path.join(lua_natives_folder, "lua_native_probes.cpp")] = generate_native_probes_cpp(functions_per_namespaces)
+
+    files[os.path.join(lua_natives_folder, "lua_native_pch.hpp")] = generate_native_pch_hpp(files)
+    files[os.path.join(lua_natives_folder, "lua_native_sources.cmake")] = generate_native_sources_cmake(files)
 
+    print(f"Wrote binding for {i} native functions")
 
-def write_hpp_code(hpp_print_buf):
-    file_name = "../src/lua/natives/lua_native_binding.hpp"
-    if os.path.exists(file_name):
-        os.remove(file_name)
-    f = open(file_name, "a")
-    f.write(hpp_print_buf)
-    f.close()
+    return files
 
-write_cpp_code(cpp_print_buf)
-write_hpp_code(hpp_print_buf)
 
+def get_binding_translation_units(namespaces):
+    """Returns the binding .cpp files to write, {file name: namespaces}. One file per namespace, unless
+    `unity_budget` is set: the namespaces rendering to less than it are then packed in lua_native_unity_<n>.cpp files,
+    in natives.hpp order, each of them up to `unity_budget` bytes."""
+    units = {}
+    unity_units = []
+    unity_size = 0
+    for namespace_name, (_, body) in namespaces.items():
+        if unity_budget == 0 or len(body) >= unity_budget:
+            units["lua_native_binding_" + namespace_name + ".cpp"] = [namespace_name]
+            continue
+        if len(unity_units) == 0 or unity_size + len(body) > unity_budget:
+            unity_units.append([])
+            unity_size = 0
+        unity_units[-1].append(namespace_name)
+        unity_size += len(body)
+
+    # A namespace left alone keeps its own file.
+    for namespace_names in [n for n in unity_units if len(n) == 1]:
+        units["lua_native_binding_" + namespace_names[0] + ".cpp"] = namespace_names
+    unity_units = [n for n in unity_units if len(n) > 1]
+    for j, namespace_names in enumerate(unity_units):
+        units[f"lua_native_unity_{j + 1}.cpp"] = namespace_names
+    if len(unity_units) > 0:
+        print(f"Packed {sum(len(n) for n in unity_units)} namespaces in {len(unity_units)} unity files")
+    return units
+
+
+def generate_native_pch_hpp(files):
+    # Every header the binding files include, minus the odd one of FIRE, in the order they include them.
+    s = "#pragma once\n"
+    s += "\n"
+    s += "// Generated by natives_gen.py, precompiled header of the Lua native binding files listed in lua_native_sources.cmake.\n"
+    s += '#include "common.hpp"\n'
+    s += '#include "lua_native_binding.hpp"\n'
+    s += '#include "natives.hpp"\n'
+    for header in ("lua_native_probes.hpp", "lua_native_raw.hpp", "lua_native_signatures.hpp", "lua_native_memo.hpp"):
+        if os.path.join(lua_natives_folder, header) in files:
+            s += f'#include "{header}"\n'
+    return s
+
+
+def generate_native_sources_cmake(files):
+    # Sorted, so the build gets the same list whatever order the files were generated in.
+    sources = sorted(os.path.basename(file_name) for file_name in files if file_name.endswith(".cpp"))
+
+    s = "# Generated by natives_gen.py, the Lua native binding files and their precompiled header, see CMakeLists.txt.\n"
+    s += "set(LUA_NATIVE_SOURCES\n"
+    for source in sources:
+        s += f'\t"${{CMAKE_CURRENT_LIST_DIR}}/{source}"\n'
+    s += ")\n"
+    s += 'set(LUA_NATIVE_PCH "${CMAKE_CURRENT_LIST_DIR}/lua_native_pch.hpp")\n'
+    return s
+
+
+def generate_native_raw_hpp():
+    return """#pragma once
+
+// Generated with natives_gen.py --raw-cfunctions, helpers of the plain lua_CFunction native wrappers.
+namespace lua::native
+{
+	// Same conversion as sol's integral getter: integers as is, other numbers rounded.
+	inline lua_Integer raw_to_integer(lua_State* L, int index)
+	{
+		if (lua_isinteger(L, index))
+			return lua_tointeger(L, index);
+		return static_cast<lua_Integer>(llround(lua_tonumber(L, index)));
+	}
+}
+"""
+
+
+def generate_native_memo_hpp():
+    return """#pragma once
+#include "lua/lua_manager.hpp"
+#include "natives.hpp"
+
+#include <list>
+#include <map>
+
+// Generated with natives_gen.py --memo, caches of the natives annotated as pure or per-frame.
+namespace lua::native
+{
+	struct native_memo_stats
+	{
+		uint64_t m_hits;
+		uint64_t m_misses;
+	};
+
+	inline std::array<native_memo_stats, big::g_crossmap.size()> g_native_memo_stats{};
+
+	enum class native_memo_policy
+	{
+		pure,
+		per_frame
+	};
+
+	// How the arguments and results are kept in the caches, strings are copied.
+	template<typename T>
+	struct native_memo_traits
+	{
+		using stored_type = T;
+
+		static T from(T value)
+		{
+			return value;
+		}
+
+		static T to(const T& value)
+		{
+			return value;
+		}
+	};
+
+	template<>
+	struct native_memo_traits<const char*>
+	{
+		using stored_type = std::optional<std::string>;
+
+		static stored_type from(const char* value)
+		{
+			return value ? stored_type(value) : std::nullopt;
+		}
+
+		static const char* to(const stored_type& value)
+		{
+			return value ? value->c_str() : nullptr;
+		}
+	};
+
+	template<>
+	struct native_memo_traits<sol::stack_object>
+	{
+		using stored_type = std::optional<std::string>;
+
+		static stored_type from(const sol::stack_object& value)
+		{
+			return value.is<const char*>() ? stored_type(value.as<const char*>()) : std::nullopt;
+		}
+	};
+
+	// Results of a native keyed by its arguments, the least recently used one is evicted past the capacity.
+	// Natives are only called from the game thread, so are the caches.
+	template<typename Result, typename... Args>
+	class native_memo
+	{
+		using key_type   = std::tuple<typename native_memo_traits<Args>::stored_type...>;
+		using entry_type = std::pair<key_type, typename native_memo_traits<Result>::stored_type>;
+
+	public:
+		native_memo(NativeIndex index, size_t capacity, native_memo_policy policy) :
+		    m_stats(g_native_memo_stats[static_cast<size_t>(index)]),
+		    m_capacity(capacity),
+		    m_policy(policy)
+		{
+		}
+
+		Result get(Result (*native)(Args...), Args... args)
+		{
+			if (m_policy == native_memo_policy::per_frame && m_frame != big::g_lua_manager->get_frame_count())
+			{
+				m_entries.clear();
+				m_lru.clear();
+				m_frame = big::g_lua_manager->get_frame_count();
+			}
+
+			key_type key{native_memo_traits<Args>::from(args)...};
+			if (auto it = m_entries.find(key); it != m_entries.end())
+			{
+				m_stats.m_hits++;
+				m_lru.splice(m_lru.begin(), m_lru, it->second);
+				return native_memo_traits<Result>::to(it->second->second);
+			}
+
+			m_stats.m_misses++;
+			m_lru.emplace_front(std::move(key), native_memo_traits<Result>::from(native(args...)));
+			m_entries.emplace(m_lru.front().first, m_lru.begin());
+			if (m_lru.size() > m_capacity)
+			{
+				m_entries.erase(m_lru.back().first);
+				m_lru.pop_back();
+			}
+			return native_memo_traits<Result>::to(m_lru.front().second);
+		}
+
+	private:
+		native_memo_stats& m_stats;
+		size_t m_capacity;
+		native_memo_policy m_policy;
+		uint64_t m_frame = 0;
+		std::list<entry_type> m_lru;
+		std::map<key_type, typename std::list<entry_type>::iterator> m_entries;
+	};
+
+	// CSV of the cache hits and misses of the memoized natives since the last reset.
+	std::string dump_native_memo();
+	void reset_native_memo();
+}
+"""
+
+
+def generate_native_memo_cpp():
+    s = ""
+    s += '#include "lua_native_binding.hpp"\n'
+    s += '#include "lua_native_memo.hpp"\n'
+    s += "\n"
+    s += "namespace lua::native\n"
+    s += "{\n"
+    s += "\t// clang-format off\n"
+    s += "\tstatic constexpr std::pair<NativeIndex, const char*> g_native_memo_names[] = {\n"
+    for namespace_name, cpp_name in memoized_natives.keys():
+        s += "\t\t{NativeIndex::" + cpp_name + ', "' + namespace_name + "::" + cpp_name + '"},\n'
+    s += "\t};\n"
+    s += "\t// clang-format on\n"
+    s += """
+	std::string dump_native_memo()
+	{
+		std::string csv = "# native,hits,misses\\n";
+		for (const auto& [index, name] : g_native_memo_names)
+		{
+			const auto& stats = g_native_memo_stats[static_cast<size_t>(index)];
+			csv += std::format("{},{},{}\\n", name, stats.m_hits, stats.m_misses);
+		}
+		return csv;
+	}
+
+	void reset_native_memo()
+	{
+		g_native_memo_stats = {};
+	}
+
+	void init_native_memo(sol::state& L)
+	{
+		auto native_memo = L["native_memo"].get_or_create<sol::table>();
+		native_memo.set_function("dump", dump_native_memo);
+		native_memo.set_function("reset", reset_native_memo);
+	}
+}
+"""
+    return s
+
+
+def generate_native_probes_hpp():
+    return """#pragma once
+#include "natives.hpp"
+
+// Generated with natives_gen.py --probes, build with LUA_NATIVE_PROBES defined
+// to count the calls and the ticks spent in each native called from Lua.
+#ifdef LUA_NATIVE_PROBES
+#include <intrin.h>
+
+namespace lua::native
+{
+	struct native_probe_stats
+	{
+		uint64_t m_calls;
+		uint64_t m_ticks;
+	};
+
+	inline std::array<native_probe_stats, big::g_crossmap.size()> g_native_probe_stats{};
+
+	class native_probe
+	{
+	public:
+		explicit native_probe(NativeIndex index) :
+		    m_stats(g_native_probe_stats[static_cast<size_t>(index)]),
+		    m_start(__rdtsc())
+		{
+		}
+
+		~native_probe()
+		{
+			m_stats.m_calls++;
+			m_stats.m_ticks += __rdtsc() - m_start;
+		}
+
+	private:
+		native_probe_stats& m_stats;
+		uint64_t m_start;
+	};
+
+	// CSV of the natives called since the last reset, usable as a natives_gen.py --call-profile file.
+	std::string dump_native_probes();
+	void reset_native_probes();
+}
+
+#define LUA_NATIVE_PROBE(index) lua::native::native_probe native_probe_(index)
+#else
+#define LUA_NATIVE_PROBE(index)
+#endif
+"""
+
+
+def generate_native_probes_cpp(functions_per_namespaces):
+    s = ""
+    s += '#include "lua_native_binding.hpp"\n'
+    s += '#include "lua_native_probes.hpp"\n'
+    s += "\n"
+    s += "namespace lua::native\n"
+    s += "{\n"
+    s += "#ifdef LUA_NATIVE_PROBES\n"
+    s += "\t// clang-format off\n"
+    s += "\tstatic constexpr std::pair<NativeIndex, const char*> g_native_probe_names[] = {\n"
+    for namespace_name, native_funcs in functions_per_namespaces.items():
+        for native_func in native_funcs:
+            s += "\t\t{NativeIndex::" + native_func.cpp_name + ', "' + namespace_name + "::" + native_func.cpp_name + '"},\n'
+    s += "\t};\n"
+    s += "\t// clang-format on\n"
+    s += """
+	std::string dump_native_probes()
+	{
+		std::string csv = "# native,calls,ticks\\n";
+		for (const auto& [index, name] : g_native_probe_names)
+		{
+			const auto& stats = g_native_probe_stats[static_cast<size_t>(index)];
+			if (stats.m_calls != 0)
+				csv += std::format("{},{},{}\\n", name, stats.m_calls, stats.m_ticks);
+		}
+		return csv;
+	}
+
+	void reset_native_probes()
+	{
+		g_native_probe_stats = {};
+	}
+#endif
+
+	void init_native_probes(sol::state& L)
+	{
+#ifdef LUA_NATIVE_PROBES
+		auto native_probes = L["native_probes"].get_or_create<sol::table>();
+		native_probes.set_function("dump", dump_native_probes);
+		native_probes.set_function("reset", reset_native_probes);
+#endif
+	}
+}
+"""
+    return s
+
+
+def write_generated_files(files):
+    remove_stale_files(files)
+
+    for file_name, content in files.items():
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        f = open(file_name, "a")
+        f.write(content)
+        f.close()
+
+
+def remove_stale_files(files):
+    # Everything under src/lua/natives/ is generated, drop what the current options no longer produce.
+    for file_name in os.listdir(lua_natives_folder):
+        file_path = os.path.join(lua_natives_folder, file_name)
+        if file_name.startswith("lua_native_") and file_path not in files:
+            os.remove(file_path)
+
+
+def add_binding_arguments(parser):
+    parser.add_argument("--probes", action="store_true", help="emit per native call counters and timing probes, enabled by building with LUA_NATIVE_PROBES defined")
+    parser.add_argument("--shared-signatures", action="store_true", help="emit one wrapper template per native signature instead of one wrapper per native")
+    parser.add_argument("--memo", metavar="FILE", help="cache the results of the natives annotated as pure or per-frame in FILE")
+    parser.add_argument("--arrays", metavar="FILE", help="also bind the natives selected in FILE as NAME_ARRAY, taking an array of handles and returning arrays of results")
+    parser.add_argument("--raw-cfunctions", action="store_true", help="bind the natives only taking and returning numbers and booleans as plain lua_CFunctions instead of through sol")
+    parser.add_argument(
+        "--vector3-returns",
+        choices=["userdata", "multi", "into"],
+        default="userdata",
+        help="return the Vector3 results of the natives as a new vec3 (userdata), as three numbers (multi) or written into vec3s the caller passes (into) (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--unity-budget",
+        type=int,
+        metavar="BYTES",
+        default=0,
+        help="pack the namespaces whose binding is smaller than BYTES in lua_native_unity_<n>.cpp files of up to BYTES each (default: one file per namespace)",
+    )
+
+
+def apply_binding_arguments(args):
+    global emit_probes, share_signatures, raw_cfunctions, vector3_returns, memo_file_name, arrays_file_name, unity_budget
+    emit_probes = args.probes
+    share_signatures = args.shared_signatures
+    raw_cfunctions = args.raw_cfunctions
+    vector3_returns = args.vector3_returns
+    memo_file_name = os.path.abspath(args.memo) if args.memo is not None else None
+    arrays_file_name = os.path.abspath(args.arrays) if args.arrays is not None else None
+    unity_budget = args.unity_budget
+    if unity_budget < 0:
+        print(f"--unity-budget must be 0 or more, got {unity_budget}")
+        exit(1)
+
+
+def get_binding_options():
+    return {
+        "probes": emit_probes,
+        "shared_signatures": share_signatures,
+        "raw_cfunctions": raw_cfunctions,
+        "vector3_returns": vector3_returns,
+        "memo": memo_file_name is not None,
+        "arrays": arrays_file_name is not None,
+        "unity_budget": unity_budget,
+    }
+
+
+def read_existing_files(file_names):
+    files = {}
+    for file_name in file_names:
+        if os.path.exists(file_name):
+            with open(file_name, "r") as f:
+                files[file_name] = f.read()
+    return files
+
+
+def watch_native_bindings(interval):
+    # Keep the natives.json / crossmap.txt model and the rendered namespaces resident,
+    # so an edit only costs re-indexing and re-rendering the namespaces that actually changed.
+    generate_natives.load_crossmap_data()
+    generate_natives.load_natives_data()
+    generate_natives.load_call_profile()
+
+    namespace_cache = {}
+    with open(natives_hpp_file_name, "r") as natives_hpp:
+        functions_per_namespaces = get_natives_func_from_natives_hpp_file(natives_hpp)
+    files = generate_native_binding_cpp_and_hpp_files(functions_per_namespaces, namespace_cache)
+    # Files of an earlier run with other options, the later changes are handled by write_changed_files.
+    remove_stale_files(files)
+    write_changed_files(read_existing_files(files.keys()), files)
+
+    header_file_names = [generate_natives.crossmap_header_file_name, natives_hpp_file_name, generate_natives.natives_table_file_name]
+    headers = read_existing_files(header_file_names)
+
+    def on_change(changed):
+        nonlocal files, headers
+
+        crossmap_changed = generate_natives.crossmap_file_name in changed
+        natives_json_changed = generate_natives.natives_json_file_name in changed
+        call_profile_changed = generate_natives.call_profile_file_name in changed
+        if crossmap_changed or natives_json_changed or call_profile_changed:
+            if crossmap_changed:
+                generate_natives.load_crossmap_data()
+            if natives_json_changed:
+                generate_natives.load_natives_data()
+            if natives_json_changed or call_profile_changed:
+                generate_natives.load_call_profile()
+            generate_natives.allocate_indices()
+
+            new_headers = {
+                generate_natives.crossmap_header_file_name: generate_natives.render_crossmap_header(),
+                natives_hpp_file_name: generate_natives.render_natives_header(),
+            }
+            natives_table = generate_natives.render_natives_table()
+            if natives_table is not None:
+                new_headers[generate_natives.natives_table_file_name] = natives_table
+            written = write_changed_files(headers, new_headers)
+            headers = new_headers
+        else:
+            written = []
+            headers = read_existing_files(header_file_names)
+
+        functions_per_namespaces = get_natives_func_from_natives_hpp_file(io.StringIO(headers[natives_hpp_file_name]))
+        new_files = generate_native_binding_cpp_and_hpp_files(functions_per_namespaces, namespace_cache)
+        written_bindings = write_changed_files(files, new_files)
+        files = new_files
+        print(f"Rewrote {len(written_bindings)} binding files")
+
+        return written + written_bindings
+
+    watch(
+        lambda: [generate_natives.crossmap_file_name, generate_natives.natives_json_file_name, natives_hpp_file_name]
+        + ([generate_natives.natives_table_file_name] if generate_natives.compact_natives else [])
+        + ([generate_natives.call_profile_file_name] if generate_natives.call_profile_file_name is not None else [])
+        + ([memo_file_name] if memo_file_name is not None else [])
+        + ([arrays_file_name] if arrays_file_name is not None else []),
+        on_change,
+        interval,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates the Lua bindings under src/lua/natives/ from src/natives.hpp.")
+    add_profile_arguments(parser)
+    add_watch_arguments(parser)
+    add_binding_arguments(parser)
+    generate_natives.add_call_profile_argument(parser)
+    generate_natives.add_crossmap_argument(parser)
+    generate_natives.add_compact_natives_argument(parser)
+    args = parser.parse_args()
+
+    apply_binding_arguments(args)
+
+    generate_natives.apply_arguments(args)
+    if args.watch:
+        watch_native_bindings(args.watch_interval)
+        return
+
+    profiler = Profiler.from_args(args)
+    profiler.start()
+
+    with profiler.stage("load"):
+        with open(natives_hpp_file_name, "r") as natives_hpp:
+            functions_per_namespaces = get_natives_func_from_natives_hpp_file(natives_hpp)
+    with profiler.stage("render"):
+        files = generate_native_binding_cpp_and_hpp_files(functions_per_namespaces)
+    with profiler.stage("write"):
+        write_generated_files(files)
+
+    profiler.report()
+
+
+if __name__ == "__main__":
+    main()
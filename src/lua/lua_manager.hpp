@@ -19,6 +19,8 @@ namespace big
 		folder m_scripts_folder;
 		folder m_scripts_config_folder;
 
+		std::uint64_t m_frame_count{};
+
 	public:
 		lua_manager(folder scripts_folder, folder scripts_config_folder);
 		~lua_manager();
@@ -44,6 +46,17 @@ namespace big
 			return m_scripts_config_folder;
 		}
 
+		// Incremented once per game frame before the scripts tick.
+		inline std::uint64_t get_frame_count() const
+		{
+			return m_frame_count;
+		}
+
+		inline void next_frame()
+		{
+			m_frame_count++;
+		}
+
 		std::weak_ptr<lua_module> get_module(rage::joaat_t module_id);
 		std::weak_ptr<lua_module> get_disabled_module(rage::joaat_t module_id);
 
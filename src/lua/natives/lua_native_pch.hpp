@@ -0,0 +1,6 @@
+#pragma once
+
+// Generated by natives_gen.py, precompiled header of the Lua native binding files listed in lua_native_sources.cmake.
+#include "common.hpp"
+#include "lua_native_binding.hpp"
+#include "natives.hpp"
@@ -0,0 +1,50 @@
+# Generated by natives_gen.py, the Lua native binding files and their precompiled header, see CMakeLists.txt.
+set(LUA_NATIVE_SOURCES
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_APP.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_AUDIO.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_BRAIN.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_CAM.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_CLOCK.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_CUTSCENE.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_DATAFILE.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_DECORATOR.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_DLC.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_ENTITY.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_EVENT.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_FILES.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_FIRE.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_GRAPHICS.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_HUD.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_INTERIOR.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_ITEMSET.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_LOADINGSCREEN.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_LOCALIZATION.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_MISC.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_MOBILE.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_MONEY.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_NETSHOPPING.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_NETWORK.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_OBJECT.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_PAD.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_PATHFIND.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_PED.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_PHYSICS.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_PLAYER.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_RECORDING.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_REPLAY.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_SAVEMIGRATION.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_SCRIPT.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_SECURITY.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_SHAPETEST.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_SOCIALCLUB.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_STATS.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_STREAMING.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_SYSTEM.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_TASK.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_VEHICLE.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_WATER.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_WEAPON.cpp"
+	"${CMAKE_CURRENT_LIST_DIR}/lua_native_binding_ZONE.cpp"
+)
+set(LUA_NATIVE_PCH "${CMAKE_CURRENT_LIST_DIR}/lua_native_pch.hpp")
@@ -36,6 +36,7 @@ namespace big
 
 	static void lua_manager_tick()
 	{
+		g_lua_manager->next_frame();
 		g_lua_manager->reload_changed_scripts();
 
 		g_lua_manager->for_each_module([](const std::shared_ptr<lua_module>& module) {